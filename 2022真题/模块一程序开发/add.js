@@ -31,7 +31,6 @@ document.getElementById('addEmployeeForm').addEventListener('submit', async func
     
     // 获取表单数据
     const formData = {
-        student_id: parseInt(localStorage.getItem('student_id')),
         name: document.getElementById('name').value,
         gender: document.getElementById('gender').value,
         age: parseInt(document.getElementById('age').value),
@@ -47,7 +46,8 @@ document.getElementById('addEmployeeForm').addEventListener('submit', async func
         const response = await fetch('http://127.0.0.1:8000/employee/add', {
             method: 'POST',
             headers: {
-                'Content-Type': 'application/json'
+                'Content-Type': 'application/json',
+                'Authorization': 'Bearer ' + localStorage.getItem('token')
             },
             body: JSON.stringify(formData)
         });
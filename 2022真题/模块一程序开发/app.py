@@ -1,22 +1,77 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Blueprint, current_app, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from sqlalchemy.orm.exc import StaleDataError
+from werkzeug.local import LocalProxy
+from datetime import datetime, timezone
+from functools import lru_cache, wraps
+import base64
+import binascii
+import csv
+import io
+import json
+import os
 
-app = Flask(__name__)
-CORS(app)
+from auth import SessionTokens, hash_password, load_secret_key, needs_rehash, verify_password
+from db_profile import DEFAULT_PROFILE, engine_options, is_memory_database, register_sqlite_pragmas
+from employee_changes import init_employee_changes
+from employee_search import build_search_query, init_employee_fts
+from employee_stats import STATS_DIMENSIONS, init_employee_stats, query_employee_stats, rebuild_employee_stats
+from metrics import Metrics
+from response_cache import ResponseCache
 
-# 数据库配置
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///employees.db'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db = SQLAlchemy(app)
+def default_config():
+    """默认配置，create_app 传入的配置会覆盖这里的同名项"""
+    return {
+        # 数据库配置
+        'SQLALCHEMY_DATABASE_URI': os.environ.get('EMPLOYEE_DB_URI', 'sqlite:///employees.db'),
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False,
+        # 数据库引擎配置方案（见 db_profile.py）：production 启用WAL等优化，default 为SQLite默认设置
+        'SQLITE_PROFILE': os.environ.get('EMPLOYEE_DB_PROFILE', DEFAULT_PROFILE),
+        # 分页配置：单页最大条数、流式输出时每批读取的条数
+        'EMPLOYEES_MAX_LIMIT': 1000,
+        'EMPLOYEES_STREAM_CHUNK': 500,
+        # 导出时每批读取的条数
+        'EMPLOYEE_EXPORT_BATCH': 1000,
+        # 批量导入配置：每个事务的行数、每条INSERT语句的行数（SQLite单条语句参数上限为999）、最多返回的错误条数
+        'EMPLOYEE_IMPORT_BATCH': 1000,
+        'EMPLOYEE_IMPORT_STATEMENT_ROWS': 90,
+        'EMPLOYEE_IMPORT_MAX_ERRORS': 1000,
+        # 批量修改单次最多条数
+        'EMPLOYEE_BATCH_UPDATE_MAX': 1000,
+        # 批量查询单次最多id数（SQLite单条语句参数上限为999）
+        'EMPLOYEE_BATCH_FETCH_MAX': 500,
+        # 读接口响应缓存：最大条目数（0 表示关闭缓存）、最大总字节数、过期秒数
+        # 缓存在进程内，修改接口只能失效本进程的缓存，多进程部署时其他进程最多返回 TTL 秒内的旧数据
+        'RESPONSE_CACHE_MAX_ENTRIES': int(os.environ.get('EMPLOYEE_RESPONSE_CACHE_MAX_ENTRIES', 1024)),
+        'RESPONSE_CACHE_MAX_BYTES': 64 * 1024 * 1024,
+        'RESPONSE_CACHE_TTL': 30,
+        # 认证配置：密码哈希迭代次数（越大越安全、登录越慢）、令牌有效期（秒）、令牌校验缓存条数
+        'PASSWORD_HASH_ITERATIONS': 200000,
+        'SESSION_TOKEN_MAX_AGE': 8 * 3600,
+        'SESSION_TOKEN_CACHE_SIZE': 4096,
+        # 监控指标：是否启用（启用后提供 /metrics 接口）、慢SQL日志阈值（毫秒）
+        'METRICS_ENABLED': os.environ.get('EMPLOYEE_METRICS', '0') == '1',
+        'SLOW_QUERY_MS': 100,
+    }
+
+db = SQLAlchemy()
+bp = Blueprint('employee_api', __name__)
+
+# 当前应用的会话令牌和响应缓存，在 create_app 中创建
+session_tokens = LocalProxy(lambda: current_app.extensions['session_tokens'])
+response_cache = LocalProxy(lambda: current_app.extensions['response_cache'])
+
+def utcnow():
+    """当前UTC时间（不带时区信息，与数据库中保存的格式一致）"""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 # 用户模型
 class User(db.Model):
     __tablename__ = 'users'
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(50), unique=True, nullable=False)
-    password = db.Column(db.String(50), nullable=False)
+    password = db.Column(db.String(128), nullable=False)  # 密码哈希
     student_id = db.Column(db.Integer, unique=True, nullable=False)  # 学号
     
 # 员工模型
@@ -32,36 +87,212 @@ class Employee(db.Model):
     email = db.Column(db.String(100))
     hire_date = db.Column(db.String(20), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.now)
+    # 最后修改时间（UTC），新增和每次修改时自动更新，用于增量同步
+    updated_at = db.Column(db.DateTime, default=utcnow, onupdate=utcnow)
+    # 变更序号：新增和每次修改时由触发器按提交顺序分配（见 employee_changes.py），用于增量同步
+    change_seq = db.Column(db.Integer)
+    # 版本号：每次修改加1，用于乐观并发控制
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
 
-# 初始化数据库
-with app.app_context():
-    db.create_all()
-    # 创建root用户（学号为1）
-    if not User.query.filter_by(username='admin').first():
-        root_user = User(username='admin', password='123456', student_id=1)
-        db.session.add(root_user)
-        db.session.commit()
+    # 条件查询使用的索引（SQLite二级索引隐含主键，同值记录按id有序）
+    __table_args__ = (
+        db.Index('ix_employees_department_position', 'department', 'position'),
+        db.Index('ix_employees_department_hire_date', 'department', 'hire_date'),
+        db.Index('ix_employees_position', 'position'),
+        db.Index('ix_employees_hire_date', 'hire_date'),
+        db.Index('ix_employees_age', 'age'),
+        db.Index('ix_employees_name', 'name'),
+        db.Index('ix_employees_updated_at', 'updated_at', 'id'),
+        db.Index('ix_employees_change_seq', 'change_seq'),
+    )
+    # ORM方式修改时自动检查并递增版本号
+    __mapper_args__ = {'version_id_col': version}
+
+def create_app(config=None):
+    """
+    创建Flask应用
+    config：覆盖默认配置的字典
+    只做配置和注册，不访问数据库，工作进程可以快速启动；建表等初始化由 init_db 完成
+    """
+    app = Flask(__name__)
+    app.config.from_mapping(default_config())
+    if config:
+        app.config.from_mapping(config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS',
+                          engine_options(app.config['SQLITE_PROFILE'], app.config['SQLALCHEMY_DATABASE_URI']))
+    if not app.config.get('SECRET_KEY'):
+        app.config['SECRET_KEY'] = load_secret_key(app.instance_path)
+
+    CORS(app)
+    db.init_app(app)
+    with app.app_context():
+        register_sqlite_pragmas(db.engine, app.config['SQLITE_PROFILE'])
+        if app.config['METRICS_ENABLED']:
+            Metrics(slow_query_seconds=app.config['SLOW_QUERY_MS'] / 1000).init_app(app, db.engine)
+
+    app.extensions['session_tokens'] = SessionTokens(
+        app.config['SECRET_KEY'],
+        max_age=app.config['SESSION_TOKEN_MAX_AGE'],
+        cache_size=app.config['SESSION_TOKEN_CACHE_SIZE']
+    )
+    app.extensions['response_cache'] = ResponseCache(
+        max_entries=app.config['RESPONSE_CACHE_MAX_ENTRIES'],
+        max_bytes=app.config['RESPONSE_CACHE_MAX_BYTES'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
+    app.register_blueprint(bp)
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """建表、建索引并创建root用户"""
+        init_db(app)
+        print('数据库初始化完成')
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """根据员工表全量重建统计汇总表"""
+        with app.app_context(), db.engine.begin() as conn:
+            rebuild_employee_stats(conn)
+        print('统计汇总表已重建')
+
+    return app
+
+def add_missing_columns(table):
+    """为旧数据库补充模型中新增的列（create_all 不会修改已存在的表）"""
+    existing = {column['name'] for column in db.inspect(db.engine).get_columns(table.name)}
+    with db.engine.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(db.engine.dialect)}'
+            if column.server_default is not None:
+                ddl += f" NOT NULL DEFAULT {column.server_default.arg}"
+            conn.execute(db.text(ddl))
+
+def init_db(app):
+    """
+    初始化数据库：建表、补建索引、全文检索表，创建root用户
+    多进程部署时只需在启动工作进程前执行一次（见 gunicorn.conf.py）
+    """
+    with app.app_context():
+        db.create_all()
+        add_missing_columns(Employee.__table__)
+        # 新增 updated_at 列之前的旧数据以创建时间作为修改时间
+        # created_at 为本地时间而 updated_at 为UTC时间，SQLite下先换算成UTC；其他数据库直接取当前时间
+        # SQLite按字符串比较时间，补全为与 SQLAlchemy 写入的值相同的 YYYY-MM-DD HH:MM:SS.ffffff 格式
+        if db.engine.dialect.name == 'sqlite':
+            backfill = ("COALESCE(strftime('%Y-%m-%d %H:%M:%f', created_at, 'utc'), "
+                        "strftime('%Y-%m-%d %H:%M:%f', 'now')) || '000'")
+        else:
+            backfill = 'CURRENT_TIMESTAMP'
+        with db.engine.begin() as conn:
+            conn.execute(db.text(
+                f'UPDATE employees SET updated_at = {backfill} WHERE updated_at IS NULL'
+            ))
+        # 已存在的旧表不会被 create_all 补建索引，这里单独检查创建
+        for index in Employee.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
+        # 全文检索表及同步触发器
+        init_employee_fts(db.engine)
+        # 统计汇总表及维护触发器
+        init_employee_stats(db.engine)
+        # 变更序号计数表及取号触发器
+        init_employee_changes(db.engine)
+        # 创建root用户（学号为1）
+        if not User.query.filter_by(username='admin').first():
+            root_user = User(username='admin',
+                             password=hash_password('123456', app.config['PASSWORD_HASH_ITERATIONS']),
+                             student_id=1)
+            db.session.add(root_user)
+            db.session.commit()
+        # 关闭初始化用的连接，避免被 fork 出的工作进程继承；内存数据库关闭连接后数据即丢失，保留连接
+        db.session.remove()
+        if not is_memory_database(app.config['SQLALCHEMY_DATABASE_URI']):
+            db.engine.dispose()
+
+def cached_response(tag):
+    """
+    读接口缓存装饰器
+    按请求路径（含查询参数）缓存状态码为200的非流式响应，并附带ETag；
+    请求头 If-None-Match 与ETag一致时返回304且不带响应体
+    tag：缓存标签，可引用视图参数，如 'employee:{emp_id}'，修改数据时按标签失效
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            key = request.full_path
+            cache_tag = tag.format(**kwargs)
+            entry = response_cache.get(key)
+            if entry is None:
+                version = response_cache.tag_version(cache_tag)
+                response = current_app.make_response(view(**kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+                entry = response_cache.set(key, response.get_data(), cache_tag, version)
+            body, etag = entry
+            response = Response(body, mimetype='application/json')
+            response.set_etag(etag)
+            return response.make_conditional(request)
+        return wrapper
+    return decorator
 
-@app.route('/login', methods=['POST'])
+def token_required(root_only=False):
+    """
+    令牌认证装饰器
+    从请求头 Authorization: Bearer <token> 读取令牌并在内存中校验，不查询数据库；
+    校验通过后令牌中的用户信息保存在 g.current_user
+    root_only：只允许root用户（学号为1）访问
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            header = request.headers.get('Authorization', '')
+            token = header[7:] if header.startswith('Bearer ') else None
+            claims = session_tokens.verify(token)
+            if claims is None:
+                return jsonify({
+                    'code': 401,
+                    'message': '未登录或登录已过期'
+                }), 401
+            if root_only and claims['student_id'] != 1:
+                return jsonify({
+                    'code': 403,
+                    'message': '权限不足，只有root用户才能执行此操作'
+                }), 403
+            g.current_user = claims
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+@bp.route('/login', methods=['POST'])
 def login():
     """
     员工登录API
-    接收用户名和密码，验证后返回登录结果
+    接收用户名和密码，验证后返回登录结果及会话令牌，
+    之后的请求在请求头中携带 Authorization: Bearer <token>
     """
     data = request.get_json()
     username = data.get('username', '')
     password = data.get('password', '')
     
     # 从数据库验证用户
-    user = User.query.filter_by(username=username, password=password).first()
+    user = User.query.filter_by(username=username).first()
     
-    if user:
+    if user and verify_password(password, user.password):
+        # 明文密码或哈希迭代次数已调整的，登录成功后按当前配置重新哈希
+        iterations = current_app.config['PASSWORD_HASH_ITERATIONS']
+        if needs_rehash(user.password, iterations):
+            user.password = hash_password(password, iterations)
+            db.session.commit()
+        token, expires_in = session_tokens.issue(user)
         return jsonify({
             'code': 200,
             'message': '登录成功',
             'data': {
                 'username': username,
-                'student_id': user.student_id
+                'student_id': user.student_id,
+                'token': token,
+                'expires_in': expires_in
             }
         })
     else:
@@ -70,7 +301,8 @@ def login():
             'message': '用户名或密码错误'
         }), 401
 
-@app.route('/employee/add', methods=['POST'])
+@bp.route('/employee/add', methods=['POST'])
+@token_required(root_only=True)
 def add_employee():
     """
     添加员工信息API
@@ -78,14 +310,6 @@ def add_employee():
     """
     data = request.get_json()
     
-    # 验证是否为root用户
-    student_id = data.get('student_id')
-    if student_id != 1:
-        return jsonify({
-            'code': 403,
-            'message': '权限不足，只有root用户才能添加员工'
-        }), 403
-    
     # 获取员工信息
     try:
         employee = Employee(
@@ -101,6 +325,7 @@ def add_employee():
         
         db.session.add(employee)
         db.session.commit()
+        response_cache.invalidate('employees')
         
         return jsonify({
             'code': 200,
@@ -116,63 +341,704 @@ def add_employee():
             'message': f'添加失败：{str(e)}'
         }), 500
 
-@app.route('/employees', methods=['GET'])
+# 员工必填字段
+EMPLOYEE_REQUIRED_FIELDS = ('name', 'gender', 'age', 'department', 'position', 'phone', 'hire_date')
+# 可修改的员工字段
+EMPLOYEE_EDITABLE_FIELDS = EMPLOYEE_REQUIRED_FIELDS + ('email',)
+# 字符串字段的最大长度（与模型定义一致）
+EMPLOYEE_FIELD_LENGTHS = {
+    'name': 50, 'gender': 10, 'department': 50, 'position': 50,
+    'phone': 20, 'email': 100, 'hire_date': 20
+}
+
+def clean_employee_field(field, value):
+    """
+    校验并规范化单个员工字段
+    返回 (value, error)，校验通过时 error 为 None
+    """
+    if field == 'email':
+        value = str(value or '').strip()
+    elif value is None or str(value).strip() == '':
+        return None, f'{field} 不能为空'
+    elif field == 'age':
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            return None, '年龄必须为整数'
+        if value < 0:
+            return None, '年龄不能为负数'
+        return value, None
+    else:
+        value = str(value).strip()
+    if len(value) > EMPLOYEE_FIELD_LENGTHS[field]:
+        return None, f'{field} 长度不能超过 {EMPLOYEE_FIELD_LENGTHS[field]}'
+    return value, None
+
+def validate_employee_row(row):
+    """
+    校验一行待导入的员工数据
+    返回 (values, error)，校验通过时 error 为 None
+    """
+    if not isinstance(row, dict):
+        return None, '数据格式错误，应为对象'
+
+    missing = [field for field in EMPLOYEE_REQUIRED_FIELDS
+               if row.get(field) is None or str(row.get(field)).strip() == '']
+    if missing:
+        return None, f'缺少必填字段：{", ".join(missing)}'
+
+    values = {}
+    for field in EMPLOYEE_EDITABLE_FIELDS:
+        values[field], error = clean_employee_field(field, row.get(field))
+        if error:
+            return None, error
+    return values, None
+
+def validate_employee_changes(data):
+    """
+    校验部分更新的字段，只处理请求中出现的可修改字段
+    返回 (values, error)，没有任何可修改字段时返回错误
+    """
+    values = {}
+    for field in EMPLOYEE_EDITABLE_FIELDS:
+        if field in data:
+            values[field], error = clean_employee_field(field, data[field])
+            if error:
+                return None, error
+    if not values:
+        return None, f'没有需要修改的字段，可修改：{", ".join(EMPLOYEE_EDITABLE_FIELDS)}'
+    return values, None
+
+def insert_employee_rows(rows):
+    """
+    在一个事务内插入一批已校验的员工数据
+    每条INSERT语句携带多行VALUES，单条语句行数受 EMPLOYEE_IMPORT_STATEMENT_ROWS 限制
+    """
+    now = datetime.now()
+    updated_at = utcnow()
+    step = current_app.config['EMPLOYEE_IMPORT_STATEMENT_ROWS']
+    for start in range(0, len(rows), step):
+        values = [dict(values, created_at=now, updated_at=updated_at) for _, values in rows[start:start + step]]
+        db.session.execute(Employee.__table__.insert().values(values))
+
+def import_employee_batch(batch, on_error):
+    """
+    导入一批数据（一个事务）
+    批量插入失败时回滚，并逐行重试以定位出错的行，其他行照常导入
+    返回成功插入的行数
+    """
+    try:
+        insert_employee_rows(batch)
+        db.session.commit()
+        return len(batch)
+    except Exception:
+        db.session.rollback()
+
+    inserted = 0
+    for row in batch:
+        try:
+            insert_employee_rows([row])
+            db.session.commit()
+            inserted += 1
+        except Exception as e:
+            db.session.rollback()
+            on_error(row[0], str(e))
+    return inserted
+
+def iter_import_rows():
+    """
+    按请求格式逐行读取待导入数据
+    支持：JSON数组、NDJSON（每行一个对象）、CSV文件上传（表单字段 file）
+    """
+    if 'file' in request.files:
+        stream = io.TextIOWrapper(request.files['file'].stream, encoding='utf-8-sig')
+        yield from csv.DictReader(stream)
+        return
+
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                yield None
+        return
+
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('employees')
+    if not isinstance(data, list):
+        raise ValueError('请求体应为员工数组、NDJSON或CSV文件')
+    yield from data
+
+@bp.route('/employee/import', methods=['POST'])
+@token_required(root_only=True)
+def import_employees():
+    """
+    批量导入员工信息API
+    只有root用户（学号为1）才能导入；
+    数据分批校验，每批在一个事务内用多行INSERT写入，
+    出错的行单独记录错误，不影响其余数据导入
+    """
+    batch_size = current_app.config['EMPLOYEE_IMPORT_BATCH']
+    max_errors = current_app.config['EMPLOYEE_IMPORT_MAX_ERRORS']
+    total = inserted = failed = 0
+    errors = []
+    batch = []
+
+    def record_error(row_no, message):
+        nonlocal failed
+        failed += 1
+        if len(errors) < max_errors:
+            errors.append({'row': row_no, 'error': message})
+
+    try:
+        for row_no, row in enumerate(iter_import_rows(), start=1):
+            total += 1
+            values, error = validate_employee_row(row)
+            if error:
+                record_error(row_no, error)
+                continue
+            batch.append((row_no, values))
+            if len(batch) >= batch_size:
+                inserted += import_employee_batch(batch, record_error)
+                batch = []
+        if batch:
+            inserted += import_employee_batch(batch, record_error)
+    except (ValueError, UnicodeDecodeError, csv.Error) as e:
+        if inserted:
+            response_cache.invalidate('employees')
+        return jsonify({
+            'code': 400,
+            'message': f'导入失败：{str(e)}',
+            'data': {
+                'total': total,
+                'inserted': inserted,
+                'failed': failed,
+                'errors': errors
+            }
+        }), 400
+
+    if inserted:
+        response_cache.invalidate('employees')
+    return jsonify({
+        'code': 200,
+        'message': '导入完成',
+        'data': {
+            'total': total,
+            'inserted': inserted,
+            'failed': failed,
+            'errors': errors
+        }
+    })
+
+# 接口返回的员工字段
+EMPLOYEE_FIELDS = ('id', 'name', 'gender', 'age', 'department', 'position', 'phone', 'email', 'hire_date', 'version')
+
+def parse_fields():
+    """
+    读取字段投影参数 fields（逗号分隔），未指定时返回全部字段
+    id 总是包含且排在第一位（分页游标依赖它）
+    返回 (fields, error)
+    """
+    value = request.args.get('fields')
+    if not value:
+        return EMPLOYEE_FIELDS, None
+    requested = [field.strip() for field in value.split(',') if field.strip()]
+    invalid = [field for field in requested if field not in EMPLOYEE_FIELDS]
+    if invalid:
+        return None, f'参数错误：未知字段 {", ".join(invalid)}，可选：{", ".join(EMPLOYEE_FIELDS)}'
+    fields = ['id']
+    for field in requested:
+        if field not in fields:
+            fields.append(field)
+    return tuple(fields), None
+
+def employee_columns(fields):
+    """字段名对应的查询列，SELECT 只读取需要的列"""
+    return [Employee.__table__.c[field] for field in fields]
+
+@lru_cache(maxsize=128)
+def compile_row_serializer(fields):
+    """
+    为一组字段生成序列化函数：直接把查询结果元组编码为JSON对象字符串，不创建ORM对象和中间字典
+    键名部分预先编码好，每行只需编码字段值
+    """
+    prefixes = ['{' + json.dumps(fields[0]) + ': '] + [', ' + json.dumps(field) + ': ' for field in fields[1:]]
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+
+    def serialize(row):
+        return ''.join([prefix + encode(value) for prefix, value in zip(prefixes, row)]) + '}'
+
+    return serialize
+
+def json_rows_response(rows, fields, **extra):
+    """
+    生成员工列表响应 {code, message, data: [...], **extra}
+    rows 为查询结果元组，列顺序与 fields 一致
+    """
+    serialize = compile_row_serializer(fields)
+    body = ('{"code": 200, "message": "获取成功", "data": ['
+            + ', '.join([serialize(row) for row in rows]) + ']'
+            + ''.join(f', {json.dumps(key)}: {json.dumps(value, ensure_ascii=False)}'
+                      for key, value in extra.items())
+            + '}')
+    return Response(body, mimetype='application/json')
+
+def fields_error(message):
+    """字段投影参数错误的响应"""
+    return jsonify({
+        'code': 400,
+        'message': message
+    }), 400
+
+def fetch_employee_page(cursor, limit, fields=EMPLOYEE_FIELDS):
+    """
+    按主键游标（keyset）读取一页员工，返回结果元组
+    返回 id 大于 cursor 的前 limit 条记录，走主键索引范围扫描，不使用 OFFSET
+    """
+    return db.session.execute(
+        db.select(*employee_columns(fields))
+        .where(Employee.id > cursor)
+        .order_by(Employee.id)
+        .limit(limit)
+    ).all()
+
+def iter_employee_chunks(cursor=0, fields=EMPLOYEE_FIELDS):
+    """按批次迭代全部员工，每批一次查询，内存只保留当前批次"""
+    chunk_size = current_app.config['EMPLOYEES_STREAM_CHUNK']
+    while True:
+        chunk = fetch_employee_page(cursor, chunk_size, fields)
+        if not chunk:
+            return
+        yield chunk
+        cursor = chunk[-1][0]
+
+def stream_employees(mode, cursor, fields=EMPLOYEE_FIELDS):
+    """
+    流式输出员工列表
+    json：与普通接口相同的 {code, message, data: [...]} 结构
+    ndjson：每行一个员工JSON对象
+    """
+    serialize = compile_row_serializer(fields)
+
+    def generate_json():
+        yield '{"code": 200, "message": "获取成功", "data": ['
+        first = True
+        for chunk in iter_employee_chunks(cursor, fields):
+            yield ('' if first else ', ') + ', '.join([serialize(row) for row in chunk])
+            first = False
+        yield ']}'
+
+    def generate_ndjson():
+        for chunk in iter_employee_chunks(cursor, fields):
+            yield ''.join([serialize(row) + '\n' for row in chunk])
+
+    if mode == 'ndjson':
+        return Response(stream_with_context(generate_ndjson()),
+                        mimetype='application/x-ndjson')
+    return Response(stream_with_context(generate_json()),
+                    mimetype='application/json')
+
+@bp.route('/employees', methods=['GET'])
+@cached_response('employees')
 def get_employees():
     """
-    获取所有员工信息
+    获取员工信息
+    不带参数时返回全部员工；
+    limit/cursor：按id游标分页，返回 next_cursor 用于获取下一页；
+    stream=json/ndjson：分批流式输出全部员工（可配合cursor从指定位置开始）；
+    fields：只返回指定字段，逗号分隔，如 fields=id,name,department
     """
-    employees = Employee.query.all()
-    employee_list = []
-    
-    for emp in employees:
-        employee_list.append({
-            'id': emp.id,
-            'name': emp.name,
-            'gender': emp.gender,
-            'age': emp.age,
-            'department': emp.department,
-            'position': emp.position,
-            'phone': emp.phone,
-            'email': emp.email,
-            'hire_date': emp.hire_date
-        })
-    
+    stream = request.args.get('stream')
+    limit = request.args.get('limit')
+    cursor = request.args.get('cursor', 0)
+
+    try:
+        cursor = int(cursor)
+        if limit is not None:
+            limit = int(limit)
+            if limit <= 0:
+                raise ValueError
+    except ValueError:
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：limit 必须为正整数，cursor 必须为整数'
+        }), 400
+
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    if stream is not None:
+        if stream not in ('json', 'ndjson'):
+            return jsonify({
+                'code': 400,
+                'message': '参数错误：stream 只能为 json 或 ndjson'
+            }), 400
+        return stream_employees(stream, cursor, fields)
+
+    if limit is None and cursor == 0:
+        rows = db.session.execute(db.select(*employee_columns(fields)).order_by(Employee.id)).all()
+        return json_rows_response(rows, fields)
+
+    # 游标分页：多取一条判断是否还有下一页
+    limit = min(limit or current_app.config['EMPLOYEES_MAX_LIMIT'], current_app.config['EMPLOYEES_MAX_LIMIT'])
+    rows = fetch_employee_page(cursor, limit + 1, fields)
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    return json_rows_response(rows, fields, next_cursor=rows[-1][0] if has_more else None)
+
+@bp.route('/employees/export', methods=['GET'])
+@token_required()
+def export_employees():
+    """
+    导出全部员工
+    format：csv（默认，带BOM可直接用Excel打开）或 ndjson
+    fields：只导出指定字段
+    通过游标按固定批次读取并立即输出，内存占用与员工总数无关
+    """
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：format 只能为 csv 或 ndjson'
+        }), 400
+
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    batch_size = current_app.config['EMPLOYEE_EXPORT_BATCH']
+
+    def iter_batches():
+        result = db.session.execute(
+            db.select(*employee_columns(fields)).order_by(Employee.id),
+            execution_options={'yield_per': batch_size}
+        )
+        try:
+            yield from result.partitions()
+        finally:
+            result.close()
+
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        buffer.write('\ufeff')
+        writer.writerow(fields)
+        yield buffer.getvalue()
+        for batch in iter_batches():
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(batch)
+            yield buffer.getvalue()
+
+    def generate_ndjson():
+        serialize = compile_row_serializer(fields)
+        for batch in iter_batches():
+            yield ''.join([serialize(row) + '\n' for row in batch])
+
+    filename = f'employees_{datetime.now():%Y%m%d%H%M%S}.{export_format}'
+    if export_format == 'csv':
+        response = Response(stream_with_context(generate_csv()), mimetype='text/csv')
+    else:
+        response = Response(stream_with_context(generate_ndjson()), mimetype='application/x-ndjson')
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
+
+def encode_change_cursor(change_seq):
+    """变更游标：最后一条记录的变更序号，编码为不透明字符串"""
+    return base64.urlsafe_b64encode(str(change_seq).encode('ascii')).decode('ascii').rstrip('=')
+
+def decode_change_cursor(cursor):
+    """
+    解析变更游标，返回变更序号，格式错误时抛出 ValueError
+    兼容按修改时间分页的旧版游标 (updated_at, id)：换算为该位置之前最大的变更序号
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('ascii')
+        if '|' not in raw:
+            return int(raw)
+        updated_at, emp_id = raw.split('|')
+        since = datetime.fromisoformat(updated_at), int(emp_id)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        raise ValueError('cursor 格式错误')
+    return db.session.execute(
+        db.select(db.func.coalesce(db.func.max(Employee.change_seq), 0))
+        .where(db.tuple_(Employee.updated_at, Employee.id) <= db.tuple_(*since))
+    ).scalar()
+
+@bp.route('/employees/changes', methods=['GET'])
+def get_employee_changes():
+    """
+    员工变更增量同步API
+    since：上次返回的 cursor，不传时从头开始（首次全量同步）
+    返回 since 之后新增或修改过的员工（按变更序号即提交顺序排序）及新的 cursor；
+    has_more 为 true 时应继续用新 cursor 拉取
+    limit：每次最多返回条数；fields：只返回指定字段
+    """
+    try:
+        limit = int(request.args.get('limit', 500))
+        if limit <= 0:
+            raise ValueError('limit 必须为正整数')
+        since = request.args.get('since')
+        since = decode_change_cursor(since) if since else 0
+    except ValueError as e:
+        return jsonify({
+            'code': 400,
+            'message': f'参数错误：{str(e)}'
+        }), 400
+
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    limit = min(limit, current_app.config['EMPLOYEES_MAX_LIMIT'])
+    # 变更序号按提交顺序分配，之后提交的修改序号一定大于 since，不需要等待进行中的事务
+    rows = db.session.execute(
+        db.select(Employee.change_seq, *employee_columns(fields))
+        .where(Employee.change_seq > since)
+        .order_by(Employee.change_seq)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if rows:
+        cursor = encode_change_cursor(rows[-1][0])
+    else:
+        cursor = request.args.get('since') or ''
+    return json_rows_response([row[1:] for row in rows], fields, cursor=cursor, has_more=has_more)
+
+# 条件查询支持的排序字段
+EMPLOYEE_SORT_FIELDS = ('id', 'name', 'age', 'hire_date', 'department', 'position')
+
+@bp.route('/employees/filter', methods=['GET'])
+def filter_employees():
+    """
+    按条件查询员工
+    查询参数（均可选，可组合）：
+    department、position：精确匹配
+    hire_date_from、hire_date_to：入职日期范围（含两端，格式YYYY-MM-DD）
+    age_min、age_max：年龄范围（含两端）
+    name_prefix：姓名前缀
+    sort：排序字段，前缀 - 表示降序，默认 id
+    limit、offset：分页
+    fields：只返回指定字段
+    """
+    args = request.args
+    try:
+        age_min = int(args['age_min']) if args.get('age_min') else None
+        age_max = int(args['age_max']) if args.get('age_max') else None
+        limit = int(args.get('limit', 100))
+        offset = int(args.get('offset', 0))
+        if limit <= 0 or offset < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：age_min、age_max、limit、offset 必须为整数'
+        }), 400
+
+    sort = args.get('sort', 'id')
+    sort_field = sort.lstrip('-')
+    if sort_field not in EMPLOYEE_SORT_FIELDS:
+        return jsonify({
+            'code': 400,
+            'message': f'参数错误：sort 只能为 {", ".join(EMPLOYEE_SORT_FIELDS)}'
+        }), 400
+
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    query = db.select(*employee_columns(fields))
+    if args.get('department'):
+        query = query.filter(Employee.department == args['department'])
+    if args.get('position'):
+        query = query.filter(Employee.position == args['position'])
+    if args.get('hire_date_from'):
+        query = query.filter(Employee.hire_date >= args['hire_date_from'])
+    if args.get('hire_date_to'):
+        query = query.filter(Employee.hire_date <= args['hire_date_to'])
+    if age_min is not None:
+        query = query.filter(Employee.age >= age_min)
+    if age_max is not None:
+        query = query.filter(Employee.age <= age_max)
+    if args.get('name_prefix'):
+        # 用范围条件代替 LIKE 'xx%'，可以直接走姓名索引
+        prefix = args['name_prefix']
+        query = query.filter(Employee.name >= prefix, Employee.name < prefix + '\U0010ffff')
+
+    column = getattr(Employee, sort_field)
+    if sort.startswith('-'):
+        query = query.order_by(column.desc(), Employee.id.desc())
+    else:
+        query = query.order_by(column, Employee.id)
+
+    limit = min(limit, current_app.config['EMPLOYEES_MAX_LIMIT'])
+    rows = db.session.execute(query.offset(offset).limit(limit + 1)).all()
+    has_more = len(rows) > limit
+
+    return json_rows_response(rows[:limit], fields, has_more=has_more)
+
+@bp.route('/employees/search', methods=['GET'])
+def search_employees():
+    """
+    全文检索员工
+    q：检索词，匹配姓名、部门、职位、邮箱中的任意片段，多个词用空格分隔
+    结果按相关度排序，limit、offset 分页；fields 只返回指定字段
+    """
+    q = request.args.get('q', '').strip()
+    try:
+        limit = int(request.args.get('limit', 20))
+        offset = int(request.args.get('offset', 0))
+        if limit <= 0 or offset < 0:
+            raise ValueError
+    except ValueError:
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：limit、offset 必须为整数'
+        }), 400
+
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    sql, params = build_search_query(q, fields)
+    if sql is None:
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：检索词不能为空'
+        }), 400
+
+    limit = min(limit, current_app.config['EMPLOYEES_MAX_LIMIT'])
+    params.update(limit=limit + 1, offset=offset)
+    rows = db.session.execute(db.text(sql), params).all()
+    has_more = len(rows) > limit
+
+    return json_rows_response(rows[:limit], fields, has_more=has_more)
+
+@bp.route('/employees/stats', methods=['GET'])
+@cached_response('employees')
+def get_employee_stats():
+    """
+    员工统计API
+    dimension：统计维度，可选 department、position、age、hire_month，多个用逗号分隔，默认全部
+    数据来自增量维护的汇总表，查询代价只与分组数有关
+    """
+    dimensions = request.args.get('dimension')
+    dimensions = dimensions.split(',') if dimensions else list(STATS_DIMENSIONS)
+    invalid = [dimension for dimension in dimensions if dimension not in STATS_DIMENSIONS]
+    if invalid:
+        return jsonify({
+            'code': 400,
+            'message': f'参数错误：dimension 只能为 {", ".join(STATS_DIMENSIONS)}'
+        }), 400
+
+    stats = query_employee_stats(db.session, dimensions)
+    total = db.session.execute(db.text(
+        "SELECT COALESCE(SUM(count), 0) FROM employee_stats WHERE dimension = 'department'"
+    )).scalar()
+
     return jsonify({
         'code': 200,
         'message': '获取成功',
-        'data': employee_list
+        'data': {
+            'total': total,
+            'stats': stats
+        }
     })
 
-@app.route('/employee/<int:emp_id>', methods=['GET'])
+def batch_employees_response(ids):
+    """
+    按id列表批量查询员工，一条 WHERE id IN (...) 查询
+    返回以id为键的对象，不存在的id值为 null，并在 not_found 中列出
+    ids 中只接受整数（不含布尔值和小数），查询参数中的id由调用方先转换
+    """
+    if not isinstance(ids, list) or not ids:
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：ids 不能为空'
+        }), 400
+    if any(isinstance(emp_id, bool) or not isinstance(emp_id, int) for emp_id in ids):
+        return jsonify({
+            'code': 400,
+            'message': '参数错误：ids 必须为整数'
+        }), 400
+    ids = list(dict.fromkeys(ids))
+    max_ids = current_app.config['EMPLOYEE_BATCH_FETCH_MAX']
+    if len(ids) > max_ids:
+        return jsonify({
+            'code': 400,
+            'message': f'参数错误：单次最多查询 {max_ids} 个员工'
+        }), 400
+
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    rows = db.session.execute(
+        db.select(*employee_columns(fields)).where(Employee.id.in_(ids))
+    ).all()
+    serialize = compile_row_serializer(fields)
+    found = {row[0]: serialize(row) for row in rows}
+    not_found = [emp_id for emp_id in ids if emp_id not in found]
+
+    body = ('{"code": 200, "message": "获取成功", "data": {'
+            + ', '.join(f'"{emp_id}": {found.get(emp_id, "null")}' for emp_id in ids)
+            + '}, "not_found": ' + json.dumps(not_found) + '}')
+    return Response(body, mimetype='application/json')
+
+@bp.route('/employees/batch', methods=['GET'])
+@cached_response('employees')
+def get_employees_batch():
+    """
+    批量获取员工信息
+    ids：员工id，逗号分隔，如 ids=1,2,3；fields：只返回指定字段
+    """
+    ids = [emp_id.strip() for emp_id in request.args.get('ids', '').split(',') if emp_id.strip()]
+    # 只把纯数字转换为整数，其余原样传入，由 batch_employees_response 返回参数错误
+    ids = [int(emp_id) if emp_id.isascii() and emp_id.isdigit() else emp_id for emp_id in ids]
+    return batch_employees_response(ids)
+
+@bp.route('/employees/batch', methods=['POST'])
+def post_employees_batch():
+    """
+    批量获取员工信息（id较多、URL过长时使用）
+    请求体：{"ids": [1, 2, 3]}；fields 通过查询参数指定
+    """
+    data = request.get_json(silent=True)
+    return batch_employees_response(data.get('ids') if isinstance(data, dict) else None)
+
+@bp.route('/employee/<int:emp_id>', methods=['GET'])
+@cached_response('employee:{emp_id}')
 def get_employee(emp_id):
     """
     获取单个员工信息
+    fields：只返回指定字段
     """
-    employee = Employee.query.get(emp_id)
+    fields, error = parse_fields()
+    if error:
+        return fields_error(error)
+
+    row = db.session.execute(
+        db.select(*employee_columns(fields)).where(Employee.id == emp_id)
+    ).first()
     
-    if not employee:
+    if not row:
         return jsonify({
             'code': 404,
             'message': '员工不存在'
         }), 404
     
-    return jsonify({
-        'code': 200,
-        'message': '获取成功',
-        'data': {
-            'id': employee.id,
-            'name': employee.name,
-            'gender': employee.gender,
-            'age': employee.age,
-            'department': employee.department,
-            'position': employee.position,
-            'phone': employee.phone,
-            'email': employee.email,
-            'hire_date': employee.hire_date
-        }
-    })
+    body = '{"code": 200, "message": "获取成功", "data": ' + compile_row_serializer(fields)(row) + '}'
+    return Response(body, mimetype='application/json')
 
-@app.route('/update', methods=['POST'])
+@bp.route('/update', methods=['POST'])
 def update_employee():
     """
     修改员工信息API
@@ -200,6 +1066,7 @@ def update_employee():
         employee.hire_date = data.get('hire_date', employee.hire_date)
         
         db.session.commit()
+        response_cache.invalidate('employees', f'employee:{employee.id}')
         
         return jsonify({
             'code': 200,
@@ -208,6 +1075,145 @@ def update_employee():
                 'id': employee.id
             }
         })
+    except StaleDataError:
+        db.session.rollback()
+        return jsonify({
+            'code': 409,
+            'message': '员工信息已被其他人修改，请刷新后重试'
+        }), 409
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'code': 500,
+            'message': f'修改失败：{str(e)}'
+        }), 500
+
+class EmployeeUpdateError(Exception):
+    """单条部分更新失败，code 为接口返回的状态码"""
+
+    def __init__(self, code, message, emp_id, version=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.emp_id = emp_id
+        self.version = version
+
+    def to_dict(self):
+        return {'id': self.emp_id, 'code': self.code, 'error': self.message, 'version': self.version}
+
+def apply_employee_patch(emp_id, data):
+    """
+    执行一条部分更新（不提交事务）
+    只更新请求中出现的字段并将版本号加1，整个操作只有一条
+    UPDATE ... WHERE id=? [AND version=?] RETURNING version 语句；
+    请求带 version 时做乐观并发检查，版本不一致抛出 EmployeeUpdateError(409)
+    返回更新后的版本号
+    """
+    values, error = validate_employee_changes(data)
+    if error:
+        raise EmployeeUpdateError(400, error, emp_id)
+
+    version = data.get('version')
+    if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+        raise EmployeeUpdateError(400, 'version 必须为整数', emp_id)
+
+    table = Employee.__table__
+    statement = table.update().where(table.c.id == emp_id)
+    if version is not None:
+        statement = statement.where(table.c.version == version)
+    statement = statement.values(version=table.c.version + 1, **values).returning(table.c.version)
+    new_version = db.session.execute(statement).scalar()
+    if new_version is not None:
+        return new_version
+
+    # 没有更新到任何行：区分员工不存在和版本冲突（只在失败时多查一次）
+    current = db.session.execute(db.select(table.c.version).where(table.c.id == emp_id)).scalar()
+    if current is None:
+        raise EmployeeUpdateError(404, '员工不存在', emp_id)
+    raise EmployeeUpdateError(409, '员工信息已被其他人修改，请刷新后重试', emp_id, current)
+
+@bp.route('/employee/<int:emp_id>', methods=['PATCH'])
+@token_required()
+def patch_employee(emp_id):
+    """
+    部分修改员工信息API
+    只修改请求中给出的字段；带 version 时版本不一致返回409
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            'code': 400,
+            'message': '请求体应为JSON对象'
+        }), 400
+
+    try:
+        version = apply_employee_patch(emp_id, data)
+        db.session.commit()
+    except EmployeeUpdateError as e:
+        db.session.rollback()
+        return jsonify({
+            'code': e.code,
+            'message': e.message,
+            'data': {
+                'id': emp_id,
+                'version': e.version
+            }
+        }), e.code
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({
+            'code': 500,
+            'message': f'修改失败：{str(e)}'
+        }), 500
+
+    response_cache.invalidate('employees', f'employee:{emp_id}')
+    return jsonify({
+        'code': 200,
+        'message': '员工信息修改成功',
+        'data': {
+            'id': emp_id,
+            'version': version
+        }
+    })
+
+@bp.route('/employees', methods=['PATCH'])
+@token_required()
+def patch_employees():
+    """
+    批量部分修改员工信息API
+    请求体：{"updates": [{"id": 1, "version": 3, "department": "..."}, ...]}
+    所有修改在一个事务内执行，任何一条失败（不存在、版本冲突、校验失败）则全部回滚，
+    并在 errors 中列出失败的条目
+    """
+    data = request.get_json(silent=True)
+    updates = data.get('updates') if isinstance(data, dict) else data
+    if not isinstance(updates, list) or not updates:
+        return jsonify({
+            'code': 400,
+            'message': '请求体应为 {"updates": [...]}，且不能为空'
+        }), 400
+    if len(updates) > current_app.config['EMPLOYEE_BATCH_UPDATE_MAX']:
+        return jsonify({
+            'code': 400,
+            'message': f'单次最多修改 {current_app.config["EMPLOYEE_BATCH_UPDATE_MAX"]} 条'
+        }), 400
+
+    results = []
+    errors = []
+    try:
+        for item in updates:
+            emp_id = item.get('id') if isinstance(item, dict) else None
+            if isinstance(emp_id, bool) or not isinstance(emp_id, int):
+                errors.append({'id': emp_id, 'code': 400, 'error': '缺少员工id或格式错误', 'version': None})
+                continue
+            try:
+                results.append({'id': emp_id, 'version': apply_employee_patch(emp_id, item)})
+            except EmployeeUpdateError as e:
+                errors.append(e.to_dict())
+        if errors:
+            db.session.rollback()
+        else:
+            db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -215,5 +1221,25 @@ def update_employee():
             'message': f'修改失败：{str(e)}'
         }), 500
 
+    if errors:
+        code = 409 if all(error['code'] == 409 for error in errors) else 400
+        return jsonify({
+            'code': code,
+            'message': '部分员工修改失败，全部修改已撤销',
+            'data': {
+                'errors': errors
+            }
+        }), code
+
+    response_cache.invalidate('employees', *(f'employee:{result["id"]}' for result in results))
+    return jsonify({
+        'code': 200,
+        'message': f'成功修改 {len(results)} 名员工',
+        'data': results
+    })
+
 if __name__ == '__main__':
+    # 开发环境：单进程调试服务器；生产环境请使用 gunicorn -c gunicorn.conf.py wsgi:app
+    app = create_app()
+    init_db(app)
     app.run(host='127.0.0.1', port=8000, debug=True)
@@ -0,0 +1,114 @@
+"""
+用户认证
+密码使用加盐的 PBKDF2-SHA256 哈希保存，迭代次数可调；
+登录后签发带过期时间的签名令牌，后续请求只需在内存中校验令牌，不再查询数据库
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import time
+from functools import lru_cache
+
+from itsdangerous import BadSignature, URLSafeSerializer
+
+PASSWORD_HASH_PREFIX = 'pbkdf2_sha256'
+
+def hash_password(password, iterations):
+    """生成密码哈希，格式：pbkdf2_sha256$迭代次数$盐$哈希值"""
+    salt = secrets.token_bytes(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return '$'.join([
+        PASSWORD_HASH_PREFIX,
+        str(iterations),
+        base64.b64encode(salt).decode('ascii'),
+        base64.b64encode(digest).decode('ascii')
+    ])
+
+def verify_password(password, stored):
+    """
+    校验密码
+    兼容旧数据：未哈希的明文密码直接比较（登录成功后会被重新哈希保存）
+    """
+    if not stored:
+        return False
+    if not stored.startswith(PASSWORD_HASH_PREFIX + '$'):
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    try:
+        _, iterations, salt, digest = stored.split('$')
+        salt = base64.b64decode(salt)
+        digest = base64.b64decode(digest)
+        iterations = int(iterations)
+    except ValueError:
+        return False
+    candidate = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, iterations)
+    return hmac.compare_digest(candidate, digest)
+
+def needs_rehash(stored, iterations):
+    """明文密码或迭代次数与当前配置不一致时需要重新哈希"""
+    parts = (stored or '').split('$')
+    return len(parts) != 4 or parts[0] != PASSWORD_HASH_PREFIX or parts[1] != str(iterations)
+
+def load_secret_key(instance_path):
+    """
+    读取令牌签名密钥
+    优先使用环境变量 EMPLOYEE_SECRET_KEY；否则使用 instance 目录下的 secret_key 文件，不存在时生成，
+    保证多个工作进程及重启前后签发的令牌都能校验通过
+    """
+    key = os.environ.get('EMPLOYEE_SECRET_KEY')
+    if key:
+        return key
+    path = os.path.join(instance_path, 'secret_key')
+    if not os.path.exists(path):
+        # 先写临时文件再用硬链接发布，多个进程同时启动时只有一个能创建成功，且不会读到半写入的文件
+        os.makedirs(instance_path, exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(secrets.token_hex(32))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+    with open(path, encoding='ascii') as f:
+        return f.read().strip()
+
+class SessionTokens:
+    """签发和校验会话令牌，校验结果按令牌字符串做LRU缓存"""
+
+    def __init__(self, secret_key, max_age, cache_size=4096):
+        self.serializer = URLSafeSerializer(secret_key, salt='employee-session')
+        self.max_age = max_age
+        self._decode = lru_cache(maxsize=cache_size)(self._decode_uncached)
+
+    def issue(self, user):
+        """为用户签发令牌，返回 (token, 有效秒数)"""
+        token = self.serializer.dumps({
+            'uid': user.id,
+            'username': user.username,
+            'student_id': user.student_id,
+            'exp': int(time.time()) + self.max_age
+        })
+        return token, self.max_age
+
+    def verify(self, token):
+        """校验令牌，有效时返回令牌中的用户信息，签名错误或已过期返回 None"""
+        if not token:
+            return None
+        claims = self._decode(token)
+        if claims is None or claims['exp'] < time.time():
+            return None
+        return claims
+
+    def _decode_uncached(self, token):
+        try:
+            claims = self.serializer.loads(token)
+        except BadSignature:
+            return None
+        if not isinstance(claims, dict) or not isinstance(claims.get('exp'), int):
+            return None
+        return claims
@@ -0,0 +1,276 @@
+"""
+员工接口压力测试
+在临时数据库中写入指定数量的员工，启动本地服务，然后依次对各接口用多个并发客户端施压，
+输出每个接口的吞吐量和 p50/p95/p99 延迟（JSON格式）；
+默认分别在开启和关闭读接口响应缓存的服务上各测一轮，结果分开输出
+
+用法：
+    python bench_api.py --rows 100000 --clients 16 --seconds 10
+    python bench_api.py --rows 1000000 --server gunicorn --workers 4 --threads 4 --output result.json
+    python bench_api.py --rows 100000 --cache off --endpoints employees,employee
+
+说明：
+    /employees 使用 limit=100 加随机游标分页读取，不拉取全表
+    客户端为同一进程内的线程，每个线程使用一个长连接
+"""
+
+import argparse
+import http.client
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+ENDPOINTS = ('login', 'employees', 'employee', 'add', 'update')
+# 缓存模式 -> 服务的 EMPLOYEE_RESPONSE_CACHE_MAX_ENTRIES（None 表示使用默认值）
+CACHE_MODES = {'cached': None, 'uncached': '0'}
+
+def seed_database(db_uri, rows, batch_size=10000):
+    """初始化数据库并写入 rows 名员工"""
+    from app import create_app, init_db, db, Employee
+
+    app = create_app({'SQLALCHEMY_DATABASE_URI': db_uri, 'SECRET_KEY': 'bench-secret-key'})
+    init_db(app)
+    with app.app_context():
+        table = Employee.__table__
+        for start in range(0, rows, batch_size):
+            db.session.execute(table.insert(), [{
+                'name': f'员工{i}',
+                'gender': '男' if i % 2 else '女',
+                'age': 20 + i % 40,
+                'department': f'部门{i % 20}',
+                'position': f'职位{i % 10}',
+                'phone': '13800138000',
+                'email': f'user{i}@example.com',
+                'hire_date': f'20{10 + i % 15}-{1 + i % 12:02d}-01'
+            } for i in range(start, min(start + batch_size, rows))])
+            db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+def free_port():
+    """获取一个空闲端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_server(args, env, port):
+    """启动被测服务，返回子进程"""
+    if args.server == 'gunicorn':
+        env = dict(env, EMPLOYEE_BIND=f'127.0.0.1:{port}',
+                   WEB_CONCURRENCY=str(args.workers), GUNICORN_THREADS=str(args.threads))
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app']
+    else:
+        command = [sys.executable, os.path.abspath(__file__), '--serve', '--port', str(port)]
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError('服务启动失败')
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('等待服务启动超时')
+
+def serve(port):
+    """--serve 模式：用多线程开发服务器运行应用"""
+    from werkzeug.serving import run_simple
+    from app import create_app
+
+    run_simple('127.0.0.1', port, create_app(), threaded=True)
+
+class Client:
+    """单个压测客户端，使用一个HTTP长连接"""
+
+    def __init__(self, port, token):
+        self.port = port
+        self.token = token
+        self.conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+
+    def request(self, method, path, body=None, auth=False):
+        headers = {'Content-Type': 'application/json'}
+        if auth:
+            headers['Authorization'] = 'Bearer ' + self.token
+        payload = json.dumps(body) if body is not None else None
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            response.read()
+            return response.status
+        except (OSError, http.client.HTTPException):
+            # 连接异常时重建连接，本次记为失败
+            self.conn.close()
+            self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            return 0
+
+def login_token(port):
+    """登录并返回令牌"""
+    login = Client(port, None)
+    login.conn.request('POST', '/login', body=json.dumps({'username': 'admin', 'password': '123456'}),
+                       headers={'Content-Type': 'application/json'})
+    token = json.loads(login.conn.getresponse().read())['data']['token']
+    login.conn.close()
+    return token
+
+def run_mode(mode, endpoints, args, env):
+    """按缓存模式启动服务，依次压测各接口后关闭服务，返回各接口的统计结果"""
+    if CACHE_MODES[mode] is not None:
+        env = dict(env, EMPLOYEE_RESPONSE_CACHE_MAX_ENTRIES=CACHE_MODES[mode])
+    port = free_port()
+    process = start_server(args, env, port)
+    try:
+        token = login_token(port)
+        results = {}
+        for endpoint in endpoints:
+            print(f'压测 {endpoint}（{mode}）...', file=sys.stderr)
+            results[endpoint] = run_endpoint(endpoint, args, port, token)
+        return results
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+def make_request(endpoint, client, rows, rng):
+    """按接口类型发送一次请求，返回状态码"""
+    if endpoint == 'login':
+        return client.request('POST', '/login', {'username': 'admin', 'password': '123456'})
+    if endpoint == 'employees':
+        return client.request('GET', f'/employees?limit=100&cursor={rng.randrange(rows)}')
+    if endpoint == 'employee':
+        return client.request('GET', f'/employee/{rng.randrange(1, rows + 1)}')
+    if endpoint == 'add':
+        return client.request('POST', '/employee/add', {
+            'name': f'压测{rng.randrange(10 ** 6)}', 'gender': '男', 'age': 30,
+            'department': '压测部', 'position': '工程师', 'phone': '13800138000',
+            'email': 'bench@example.com', 'hire_date': '2024-01-01'
+        }, auth=True)
+    return client.request('POST', '/update', {'id': rng.randrange(1, rows + 1), 'age': rng.randrange(20, 60)})
+
+def percentile(sorted_values, p):
+    """最近秩法百分位数"""
+    if not sorted_values:
+        return None
+    index = max(0, math.ceil(p / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def run_endpoint(endpoint, args, port, token):
+    """用 args.clients 个并发客户端对一个接口施压 args.seconds 秒，返回统计结果"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.perf_counter() + args.seconds
+
+    def worker(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        client = Client(port, token)
+        local_latencies = []
+        local_errors = 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            status = make_request(endpoint, client, args.rows, rng)
+            elapsed = time.perf_counter() - start
+            if status == 200:
+                local_latencies.append(elapsed)
+            else:
+                local_errors += 1
+        client.conn.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors += local_errors
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    to_ms = lambda value: round(value * 1000, 3) if value is not None else None
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'throughput': round(len(latencies) / elapsed, 1),
+        'p50_ms': to_ms(percentile(latencies, 50)),
+        'p95_ms': to_ms(percentile(latencies, 95)),
+        'p99_ms': to_ms(percentile(latencies, 99)),
+        'max_ms': to_ms(latencies[-1] if latencies else None)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='员工接口压力测试')
+    parser.add_argument('--rows', type=int, default=10000, help='预先写入的员工数（1000 ~ 1000000）')
+    parser.add_argument('--clients', type=int, default=8, help='并发客户端数')
+    parser.add_argument('--seconds', type=float, default=10, help='每个接口的压测时长（秒）')
+    parser.add_argument('--endpoints', default=','.join(ENDPOINTS),
+                        help=f'要测试的接口，逗号分隔，可选：{",".join(ENDPOINTS)}')
+    parser.add_argument('--server', choices=('werkzeug', 'gunicorn'), default='werkzeug',
+                        help='被测服务：werkzeug 多线程开发服务器或 gunicorn 多进程')
+    parser.add_argument('--workers', type=int, default=4, help='gunicorn 工作进程数')
+    parser.add_argument('--threads', type=int, default=4, help='gunicorn 每进程线程数')
+    parser.add_argument('--cache', choices=('both', 'on', 'off'), default='both',
+                        help='读接口响应缓存：both 开启、关闭各测一轮，on 只测开启，off 只测关闭')
+    parser.add_argument('--output', help='结果写入的JSON文件，默认输出到标准输出')
+    parser.add_argument('--serve', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.port)
+        return
+
+    endpoints = args.endpoints.split(',')
+    invalid = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if invalid:
+        parser.error(f'未知接口：{", ".join(invalid)}')
+
+    tmp = tempfile.mkdtemp(prefix='employee-bench-')
+    db_uri = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+    env = dict(os.environ, EMPLOYEE_DB_URI=db_uri, EMPLOYEE_SECRET_KEY='bench-secret-key')
+    modes = {'both': ('cached', 'uncached'), 'on': ('cached',), 'off': ('uncached',)}[args.cache]
+    try:
+        print(f'写入 {args.rows} 名员工...', file=sys.stderr)
+        start = time.perf_counter()
+        seed_database(db_uri, args.rows)
+        seed_seconds = time.perf_counter() - start
+
+        results = {
+            'config': {
+                'rows': args.rows,
+                'clients': args.clients,
+                'seconds': args.seconds,
+                'server': args.server,
+                'workers': args.workers if args.server == 'gunicorn' else 1,
+                'threads': args.threads if args.server == 'gunicorn' else None,
+                'seed_seconds': round(seed_seconds, 3)
+            }
+        }
+        # cached：开启响应缓存，读接口结果主要反映缓存命中；uncached：关闭缓存，每次读请求都查询数据库
+        for mode in modes:
+            results[mode] = run_mode(mode, endpoints, args, env)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
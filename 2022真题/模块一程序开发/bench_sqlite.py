@@ -0,0 +1,126 @@
+"""
+SQLite 引擎配置并发基准测试
+分别在 default 和 production 配置下，用多个读进程和写进程同时访问接口，
+统计读/写吞吐量以及 "database is locked" 等失败次数；
+读接口的响应缓存会关闭，保证每次读请求都访问数据库
+
+用法：
+    python bench_sqlite.py --seconds 10 --readers 8 --writers 4 --rows 5000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+def bench_client(app, kind, seed, args, deadline, queue):
+    """压测进程：持续发送读或写请求直到截止时间，结果放入队列"""
+    from app import db
+
+    # fork 后不复用父进程的连接
+    with app.app_context():
+        db.engine.dispose()
+
+    client = app.test_client()
+    ok = errors = 0
+    i = seed
+    while time.time() < deadline:
+        if kind == 'read':
+            response = client.get(f'/employees?limit=50&cursor={i % args.rows}')
+            i += 50
+        else:
+            response = client.post('/update', json={'id': i % args.rows + 1, 'age': 20 + i % 40})
+            i += args.writers
+        if response.status_code == 200:
+            ok += 1
+        else:
+            errors += 1
+    queue.put((kind, ok, errors))
+
+def run_worker(args):
+    """子进程：在指定配置下执行压测，结果以JSON输出到标准输出"""
+    from app import create_app, init_db, db, Employee
+
+    app = create_app({'RESPONSE_CACHE_MAX_ENTRIES': 0})
+    init_db(app)
+    with app.app_context():
+        db.session.execute(Employee.__table__.insert(), [{
+            'name': f'员工{i}',
+            'gender': '男' if i % 2 else '女',
+            'age': 20 + i % 40,
+            'department': f'部门{i % 10}',
+            'position': f'职位{i % 5}',
+            'phone': '13800138000',
+            'email': f'user{i}@example.com',
+            'hire_date': '2024-01-01'
+        } for i in range(args.rows)])
+        db.session.commit()
+        db.session.remove()
+        db.engine.dispose()
+
+    # 每个客户端一个进程，避免GIL掩盖数据库锁竞争
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    start = time.time()
+    deadline = start + args.seconds
+    processes = [context.Process(target=bench_client, args=(app, 'read', i * 997, args, deadline, queue))
+                 for i in range(args.readers)]
+    processes += [context.Process(target=bench_client, args=(app, 'write', i, args, deadline, queue))
+                  for i in range(args.writers)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.time() - start
+
+    stats = {'read': 0, 'write': 0, 'read_errors': 0, 'write_errors': 0}
+    for kind, ok, errors in results:
+        stats[kind] += ok
+        stats[kind + '_errors'] += errors
+    stats['seconds'] = round(elapsed, 3)
+    stats['read_per_sec'] = round(stats['read'] / elapsed, 1)
+    stats['write_per_sec'] = round(stats['write'] / elapsed, 1)
+    print(json.dumps(stats))
+
+def run_profile(profile, args):
+    """在独立的临时数据库和子进程中运行一种配置"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env['EMPLOYEE_DB_PROFILE'] = profile
+        env['EMPLOYEE_DB_URI'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        command = [sys.executable, os.path.abspath(__file__), '--worker',
+                   '--seconds', str(args.seconds), '--readers', str(args.readers),
+                   '--writers', str(args.writers), '--rows', str(args.rows)]
+        output = subprocess.run(command, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+                                capture_output=True, text=True, check=True).stdout
+        return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description='SQLite 引擎配置并发基准测试')
+    parser.add_argument('--seconds', type=float, default=10, help='每种配置的压测时长（秒）')
+    parser.add_argument('--readers', type=int, default=8, help='读进程数')
+    parser.add_argument('--writers', type=int, default=4, help='写进程数')
+    parser.add_argument('--rows', type=int, default=5000, help='预先写入的员工数')
+    parser.add_argument('--profiles', default='default,production', help='要对比的配置方案，逗号分隔')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {}
+    for profile in args.profiles.split(','):
+        results[profile] = run_profile(profile, args)
+        r = results[profile]
+        print(f"{profile:<12} 读 {r['read_per_sec']:>8}/s  写 {r['write_per_sec']:>8}/s  "
+              f"读失败 {r['read_errors']}  写失败 {r['write_errors']}", file=sys.stderr)
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == '__main__':
+    main()
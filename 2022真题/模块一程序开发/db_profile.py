@@ -0,0 +1,83 @@
+"""
+SQLite 数据库引擎配置
+在每个新连接建立时设置 PRAGMA，并提供连接池参数
+"""
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# 引擎配置方案
+# default：SQLite默认设置（回滚日志模式，读写互相阻塞）
+# production：WAL模式，读不阻塞写；写冲突时等待 busy_timeout 而不是立即报 "database is locked"
+SQLITE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'pool': {}
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',     # WAL模式下NORMAL已能保证数据库不损坏，只在checkpoint时fsync
+            'busy_timeout': 5000,        # 毫秒
+            'cache_size': -20000,        # 负数表示KB，约20MB页缓存
+            'mmap_size': 268435456,      # 256MB内存映射读
+            'temp_store': 'MEMORY'
+        },
+        'pool': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 10,
+            'pool_pre_ping': False
+        }
+    }
+}
+
+DEFAULT_PROFILE = 'production'
+
+# 连接池大小参数，只适用于 QueuePool
+POOL_SIZE_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+def get_profile(name):
+    """按名称获取配置方案，名称无效时抛出 ValueError"""
+    if name not in SQLITE_PROFILES:
+        raise ValueError(f'未知的数据库配置方案：{name}，可选：{", ".join(SQLITE_PROFILES)}')
+    return SQLITE_PROFILES[name]
+
+def is_memory_database(uri):
+    """是否为SQLite内存数据库（sqlite://、:memory: 或 mode=memory），此类数据库使用 StaticPool"""
+    url = make_url(uri)
+    return (url.get_backend_name() == 'sqlite'
+            and (url.database in (None, '', ':memory:') or url.query.get('mode') == 'memory'))
+
+def engine_options(name, uri=None):
+    """
+    生成 SQLALCHEMY_ENGINE_OPTIONS
+    连接池大小取自配置方案，内存数据库（单连接的 StaticPool）不设置；驱动层的 timeout 与 busy_timeout 保持一致
+    """
+    profile = get_profile(name)
+    options = dict(profile['pool'])
+    if uri is not None and is_memory_database(uri):
+        for key in POOL_SIZE_OPTIONS:
+            options.pop(key, None)
+    busy_timeout = profile['pragmas'].get('busy_timeout')
+    if busy_timeout is not None:
+        options['connect_args'] = {
+            'timeout': busy_timeout / 1000,
+            'check_same_thread': False
+        }
+    return options
+
+def register_sqlite_pragmas(engine, name):
+    """在引擎上注册连接事件，每个新建的连接都执行配置方案中的 PRAGMA"""
+    pragmas = get_profile(name)['pragmas']
+    if not pragmas or engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for key, value in pragmas.items():
+                cursor.execute(f'PRAGMA {key}={value}')
+        finally:
+            cursor.close()
@@ -0,0 +1,59 @@
+"""
+员工变更序号
+员工表的 change_seq 列保存每名员工最后一次新增或修改的序号，由触发器在写事务内从计数表 employee_change_counter 取号。
+SQLite同一时间只有一个写事务，序号随提交顺序递增：增量同步按序号分页时，之后提交的修改序号一定大于已返回的游标，
+不会像按修改时间分页那样，因 updated_at 在Python中生成、早于实际提交而被跳过
+"""
+
+from sqlalchemy import text
+
+CHANGES_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS employee_change_counter (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        value INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO employee_change_counter (id, value) VALUES (1, 0)",
+)
+
+# 触发器自身对 change_seq 的更新不满足 WHEN 条件，不会再次取号
+CHANGES_TRIGGERS_DDL = (
+    """
+    CREATE TRIGGER IF NOT EXISTS employees_change_seq_ai AFTER INSERT ON employees BEGIN
+        UPDATE employee_change_counter SET value = value + 1;
+        UPDATE employees SET change_seq = (SELECT value FROM employee_change_counter) WHERE id = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS employees_change_seq_au AFTER UPDATE ON employees
+    WHEN new.change_seq IS old.change_seq BEGIN
+        UPDATE employee_change_counter SET value = value + 1;
+        UPDATE employees SET change_seq = (SELECT value FROM employee_change_counter) WHERE id = new.id;
+    END
+    """,
+)
+
+def init_employee_changes(engine):
+    """
+    创建计数表和取号触发器
+    还没有序号的员工（新增 change_seq 列之前的旧数据）按 (updated_at, id) 顺序补齐序号；非SQLite数据库直接跳过
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as conn:
+        for statement in CHANGES_DDL:
+            conn.execute(text(statement))
+        conn.execute(text(
+            'UPDATE employees SET change_seq = ranked.seq '
+            'FROM (SELECT id, (SELECT value FROM employee_change_counter) '
+            '             + ROW_NUMBER() OVER (ORDER BY updated_at, id) AS seq '
+            '      FROM employees WHERE change_seq IS NULL) AS ranked '
+            'WHERE employees.id = ranked.id'
+        ))
+        conn.execute(text(
+            'UPDATE employee_change_counter '
+            'SET value = MAX(value, (SELECT COALESCE(MAX(change_seq), 0) FROM employees))'
+        ))
+        for statement in CHANGES_TRIGGERS_DDL:
+            conn.execute(text(statement))
@@ -0,0 +1,167 @@
+"""
+员工全文检索
+使用 SQLite FTS5 外部内容表 employees_fts 镜像员工表中可检索的列，
+由触发器在员工新增、修改、删除时自动同步
+
+trigram 分词器只能检索至少3个字符的词，两个字的中文姓名等短词另用普通表 employee_search_grams 检索：
+该表保存各列从每个位置开始的两个字符（末位为单个字符），两字词按等值、单字词按前缀走主键索引；
+维护触发器只使用SQLite内置函数，sqlite3 命令行等其他程序修改员工表时同样会同步
+"""
+
+from sqlalchemy import text
+
+# 参与全文检索的列及其排序权重（姓名命中权重最高）
+FTS_COLUMNS = ('name', 'department', 'position', 'email')
+FTS_WEIGHTS = (10.0, 3.0, 3.0, 1.0)
+
+# trigram 分词器支持任意子串（含中文）检索，查询词至少3个字符才能走 employees_fts，
+# 更短的词走两字索引 employee_search_grams
+FTS_MIN_TERM_LENGTH = 3
+
+# 两字索引覆盖每列的前 GRAM_MAX_POSITION 个字符（接口限制各列不超过100个字符）
+GRAM_MAX_POSITION = 255
+
+FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS employees_fts USING fts5(
+        name, department, position, email,
+        content='employees', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS employees_fts_ai AFTER INSERT ON employees BEGIN
+        INSERT INTO employees_fts(rowid, name, department, position, email)
+        VALUES (new.id, new.name, new.department, new.position, new.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS employees_fts_ad AFTER DELETE ON employees BEGIN
+        INSERT INTO employees_fts(employees_fts, rowid, name, department, position, email)
+        VALUES ('delete', old.id, old.name, old.department, old.position, old.email);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS employees_fts_au AFTER UPDATE OF name, department, position, email
+    ON employees BEGIN
+        INSERT INTO employees_fts(employees_fts, rowid, name, department, position, email)
+        VALUES ('delete', old.id, old.name, old.department, old.position, old.email);
+        INSERT INTO employees_fts(rowid, name, department, position, email)
+        VALUES (new.id, new.name, new.department, new.position, new.email);
+    END
+    """,
+)
+
+def _grams_sql(row):
+    """生成 row（new / old）各列全部两字片段的查询，结果列为 gram"""
+    columns = ' UNION ALL '.join(f'SELECT {row}.{column} AS value' if i == 0 else f'SELECT {row}.{column}'
+                                 for i, column in enumerate(FTS_COLUMNS))
+    return (f'SELECT lower(substr(c.value, p.n, 2)) AS gram FROM ({columns}) AS c '
+            f'JOIN employee_search_positions AS p ON p.n <= length(c.value)')
+
+GRAMS_DDL = (
+    """
+    CREATE TABLE IF NOT EXISTS employee_search_positions (
+        n INTEGER PRIMARY KEY
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS employee_search_grams (
+        gram TEXT NOT NULL,
+        employee_id INTEGER NOT NULL,
+        PRIMARY KEY (gram, employee_id)
+    ) WITHOUT ROWID
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS employee_search_grams_ai AFTER INSERT ON employees BEGIN
+        INSERT OR IGNORE INTO employee_search_grams (gram, employee_id)
+        SELECT gram, new.id FROM ({_grams_sql('new')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS employee_search_grams_ad AFTER DELETE ON employees BEGIN
+        DELETE FROM employee_search_grams WHERE employee_id = old.id AND gram IN ({_grams_sql('old')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS employee_search_grams_au AFTER UPDATE OF name, department, position, email
+    ON employees BEGIN
+        DELETE FROM employee_search_grams WHERE employee_id = old.id AND gram IN ({_grams_sql('old')});
+        INSERT OR IGNORE INTO employee_search_grams (gram, employee_id)
+        SELECT gram, new.id FROM ({_grams_sql('new')});
+    END
+    """,
+)
+
+# 早期版本的单字索引依赖应用注册的自定义SQL函数，其他程序修改员工表时会出错，升级时删除
+LEGACY_DDL = (
+    'DROP TRIGGER IF EXISTS employees_fts_short_ai',
+    'DROP TRIGGER IF EXISTS employees_fts_short_ad',
+    'DROP TRIGGER IF EXISTS employees_fts_short_au',
+    'DROP TABLE IF EXISTS employees_fts_short',
+)
+
+def init_employee_fts(engine):
+    """
+    创建全文索引表、两字索引表和同步触发器
+    首次创建时根据员工表现有数据重建索引；非SQLite数据库直接跳过
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as conn:
+        existing = {row[0] for row in conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name IN ('employees_fts', 'employee_search_grams')"
+        ))}
+        for statement in LEGACY_DDL + FTS_DDL + GRAMS_DDL:
+            conn.execute(text(statement))
+        conn.execute(text(
+            'INSERT OR IGNORE INTO employee_search_positions (n) '
+            'WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < :max) '
+            'SELECT n FROM seq'
+        ), {'max': GRAM_MAX_POSITION})
+        if 'employees_fts' not in existing:
+            conn.execute(text("INSERT INTO employees_fts(employees_fts) VALUES('rebuild')"))
+        if 'employee_search_grams' not in existing:
+            for column in FTS_COLUMNS:
+                conn.execute(text(
+                    f'INSERT OR IGNORE INTO employee_search_grams (gram, employee_id) '
+                    f'SELECT lower(substr(e.{column}, p.n, 2)), e.id FROM employees AS e '
+                    f'JOIN employee_search_positions AS p ON p.n <= length(e.{column})'
+                ))
+
+def build_search_query(q, columns):
+    """
+    将用户输入的检索词转换为SQL
+    按空白拆分为多个词，各词之间为"且"关系；
+    长度足够的词转为 employees_fts 短语匹配，过短的词在两字索引中查找：
+    两字词等值匹配，单字词匹配以该字开头的片段（与 LIKE 一样只忽略ASCII字母的大小写）
+    返回 (sql, params)，检索词为空时返回 (None, None)
+    """
+    terms = q.split()
+    if not terms:
+        return None, None
+
+    params = {}
+    match_terms = []
+    where = []
+    for i, term in enumerate(terms):
+        if len(term) >= FTS_MIN_TERM_LENGTH:
+            match_terms.append('"' + term.replace('"', '""') + '"')
+            continue
+        params[f't{i}'] = term
+        if len(term) == 2:
+            condition = f'gram = lower(:t{i})'
+        else:
+            condition = f'gram >= lower(:t{i}) AND gram < lower(:t{i}) || char(1114111)'
+        where.append(f'e.id IN (SELECT employee_id FROM employee_search_grams WHERE {condition})')
+
+    select = ', '.join(f'e.{column}' for column in columns)
+    if match_terms:
+        params['match'] = ' AND '.join(match_terms)
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        sql = (f'SELECT {select} FROM employees_fts f JOIN employees e ON e.id = f.rowid '
+               f'WHERE employees_fts MATCH :match '
+               + ''.join(f'AND {condition} ' for condition in where)
+               + f'ORDER BY bm25(employees_fts, {weights}), e.id ')
+    else:
+        sql = f'SELECT {select} FROM employees e WHERE ' + ' AND '.join(where) + ' ORDER BY e.id '
+    return sql + 'LIMIT :limit OFFSET :offset', params
@@ -0,0 +1,111 @@
+"""
+员工统计汇总
+汇总表 employee_stats 按维度保存各分组人数，由触发器在员工新增、修改、删除时增量维护，
+统计接口只需读取分组数量级的行，不再扫描员工表
+
+维度：
+    department  部门
+    position    职位
+    age         年龄段（每10岁一组，如 20-29）
+    hire_month  入职月份（YYYY-MM）
+"""
+
+from sqlalchemy import text
+
+STATS_DIMENSIONS = ('department', 'position', 'age', 'hire_month')
+
+# 各维度分组值的SQL表达式，{row} 替换为 new / old 或表别名
+BUCKET_EXPRESSIONS = {
+    'department': '{row}.department',
+    'position': '{row}.position',
+    'age': "printf('%d-%d', ({row}.age / 10) * 10, ({row}.age / 10) * 10 + 9)",
+    'hire_month': 'substr({row}.hire_date, 1, 7)',
+}
+
+# 各维度的排序方式
+ORDER_BY = {
+    'department': 'count DESC, bucket',
+    'position': 'count DESC, bucket',
+    'age': 'CAST(bucket AS INTEGER)',
+    'hire_month': 'bucket',
+}
+
+STATS_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS employee_stats (
+        dimension VARCHAR(20) NOT NULL,
+        bucket VARCHAR(50) NOT NULL,
+        count INTEGER NOT NULL,
+        PRIMARY KEY (dimension, bucket)
+    )
+"""
+
+def _increment_sql(row, delta):
+    """生成对所有维度的分组计数加减 delta 的语句"""
+    statements = []
+    for dimension, expression in BUCKET_EXPRESSIONS.items():
+        bucket = expression.format(row=row)
+        statements.append(
+            f"INSERT INTO employee_stats(dimension, bucket, count) VALUES ('{dimension}', {bucket}, {delta}) "
+            f"ON CONFLICT(dimension, bucket) DO UPDATE SET count = count + ({delta});"
+        )
+    if delta < 0:
+        statements.append("DELETE FROM employee_stats WHERE count <= 0;")
+    return '\n'.join(statements)
+
+STATS_TRIGGERS_DDL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS employee_stats_ai AFTER INSERT ON employees BEGIN
+        {_increment_sql('new', 1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS employee_stats_ad AFTER DELETE ON employees BEGIN
+        {_increment_sql('old', -1)}
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS employee_stats_au AFTER UPDATE OF department, position, age, hire_date
+    ON employees BEGIN
+        {_increment_sql('old', -1)}
+        {_increment_sql('new', 1)}
+    END
+    """,
+)
+
+def rebuild_employee_stats(conn):
+    """根据员工表全量重建汇总表"""
+    conn.execute(text('DELETE FROM employee_stats'))
+    for dimension, expression in BUCKET_EXPRESSIONS.items():
+        bucket = expression.format(row='e')
+        conn.execute(text(
+            f"INSERT INTO employee_stats(dimension, bucket, count) "
+            f"SELECT '{dimension}', {bucket}, COUNT(*) FROM employees e GROUP BY {bucket}"
+        ))
+
+def init_employee_stats(engine):
+    """
+    创建汇总表和维护触发器
+    首次创建时根据员工表现有数据重建汇总；非SQLite数据库直接跳过
+    """
+    if engine.dialect.name != 'sqlite':
+        return
+    with engine.begin() as conn:
+        exists = conn.execute(text(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='employee_stats'"
+        )).first()
+        conn.execute(text(STATS_TABLE_DDL))
+        for statement in STATS_TRIGGERS_DDL:
+            conn.execute(text(statement))
+        if not exists:
+            rebuild_employee_stats(conn)
+
+def query_employee_stats(conn, dimensions):
+    """读取指定维度的分组人数，返回 {维度: [{'bucket': ..., 'count': ...}, ...]}"""
+    result = {}
+    for dimension in dimensions:
+        rows = conn.execute(text(
+            f'SELECT bucket, count FROM employee_stats WHERE dimension = :dimension '
+            f'ORDER BY {ORDER_BY[dimension]}'
+        ), {'dimension': dimension}).all()
+        result[dimension] = [{'bucket': row.bucket, 'count': row.count} for row in rows]
+    return result
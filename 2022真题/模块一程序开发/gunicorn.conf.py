@@ -0,0 +1,26 @@
+"""
+gunicorn 多进程部署配置
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+环境变量：
+    EMPLOYEE_BIND      监听地址，默认 127.0.0.1:8000
+    WEB_CONCURRENCY    工作进程数，默认 CPU核数 * 2 + 1
+    GUNICORN_THREADS   每个工作进程的线程数，默认 4
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('EMPLOYEE_BIND', '127.0.0.1:8000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread'
+timeout = 30
+keepalive = 5
+# 每个工作进程自己创建应用和数据库连接池，不在主进程预加载
+preload_app = False
+
+def on_starting(server):
+    """主进程启动时初始化一次数据库，工作进程不再执行建表，避免并发 create_all"""
+    from app import create_app, init_db
+    init_db(create_app())
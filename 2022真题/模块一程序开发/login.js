@@ -28,6 +28,7 @@ document.getElementById('loginForm').addEventListener('submit', async function(e
             // 登录成功，保存用户信息
             localStorage.setItem('username', result.data.username);
             localStorage.setItem('student_id', result.data.student_id);
+            localStorage.setItem('token', result.data.token);
             // 跳转到首页
             window.location.href = 'index.html';
         } else {
@@ -0,0 +1,183 @@
+"""
+请求监控指标
+记录每个接口的请求数、延迟分布、响应大小，以及每个请求执行的SQL条数和耗时，
+超过阈值的慢SQL写入日志；/metrics 以 Prometheus 文本格式输出全部指标
+
+指标保存在进程内，gunicorn 多进程部署时每次抓取到的是处理该请求的工作进程的数据
+"""
+
+import logging
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+
+logger = logging.getLogger('employee.sql')
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SIZE_BUCKETS = (100, 1000, 10000, 100000, 1000000, 10000000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+def _format_labels(names, values, extra=''):
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class Counter:
+    """按标签计数"""
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} counter']
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f'{self.name}{_format_labels(self.labels, label_values)} {_format_number(value)}')
+        return lines
+
+class Histogram:
+    """按标签统计分布（累计桶、总和、次数）"""
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._values = {}      # label_values -> [各桶计数, 总和, 次数]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            entry = self._values.get(label_values)
+            if entry is None:
+                entry = self._values[label_values] = [[0] * len(self.buckets), 0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} histogram']
+        with self._lock:
+            for label_values, (counts, total, count) in sorted(self._values.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    le = _format_labels(self.labels, label_values, f'le="{bound}"')
+                    lines.append(f'{self.name}_bucket{le} {cumulative}')
+                le = _format_labels(self.labels, label_values, 'le="+Inf"')
+                lines.append(f'{self.name}_bucket{le} {count}')
+                labels = _format_labels(self.labels, label_values)
+                lines.append(f'{self.name}_sum{labels} {_format_number(total)}')
+                lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+class Metrics:
+    """
+    Flask请求监控
+    init_app 注册请求钩子、SQL执行事件和 /metrics 接口
+    """
+
+    def __init__(self, slow_query_seconds=0.1):
+        self.slow_query_seconds = slow_query_seconds
+        self.requests = Counter('http_requests_total', '请求总数', ('endpoint', 'method', 'status'))
+        self.latency = Histogram('http_request_duration_seconds', '请求处理耗时（秒）',
+                                 ('endpoint', 'method'), LATENCY_BUCKETS)
+        self.response_size = Histogram('http_response_size_bytes', '响应体大小（字节，不含流式响应）',
+                                       ('endpoint', 'method'), SIZE_BUCKETS)
+        self.queries_per_request = Histogram('db_queries_per_request', '每个请求执行的SQL条数',
+                                             ('endpoint', 'method'), QUERY_COUNT_BUCKETS)
+        self.query_latency = Histogram('db_query_duration_seconds', '单条SQL执行耗时（秒）',
+                                       ('endpoint',), LATENCY_BUCKETS)
+        self.slow_queries = Counter('db_slow_queries_total', '慢SQL条数', ('endpoint',))
+
+    def init_app(self, app, engine):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        event.listen(engine, 'handle_error', self._handle_error)
+        app.add_url_rule('/metrics', 'metrics', self.render_view)
+        app.extensions['metrics'] = self
+
+    @staticmethod
+    def _endpoint():
+        """用路由模板作为标签（如 /employee/<int:emp_id>），避免每个id生成一组指标"""
+        if not has_request_context():
+            return 'background'
+        return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+    def _before_request(self):
+        g.metrics_request = {'start': time.perf_counter(), 'queries': 0}
+
+    def _after_request(self, response):
+        state = g.get('metrics_request')
+        if state is None:
+            return response
+        labels = (self._endpoint(), request.method)
+        status = str(response.status_code)
+        if response.is_streamed:
+            # 流式响应的查询和序列化在发送响应体时才执行，响应关闭后再记录（此时请求上下文可能已结束）
+            response.call_on_close(lambda: self._record(labels, status, state))
+        else:
+            self._record(labels, status, state, response.calculate_content_length() or 0)
+        return response
+
+    def _record(self, labels, status, state, size=None):
+        """记录一个请求的指标，size 为 None 表示流式响应，不统计响应大小"""
+        self.requests.inc(labels + (status,))
+        self.latency.observe(labels, time.perf_counter() - state['start'])
+        self.queries_per_request.observe(labels, state['queries'])
+        if size is not None:
+            self.response_size.observe(labels, size)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['metrics_query_start'].pop()
+        endpoint = self._endpoint()
+        self.query_latency.observe((endpoint,), elapsed)
+        if has_request_context() and 'metrics_request' in g:
+            g.metrics_request['queries'] += 1
+        if elapsed >= self.slow_query_seconds:
+            self.slow_queries.inc((endpoint,))
+            logger.warning('慢SQL %.1fms [%s]: %s', elapsed * 1000, endpoint, ' '.join(statement.split())[:500])
+
+    def _handle_error(self, context):
+        """SQL执行出错时不会触发 after_cursor_execute，在这里弹出开始时间，避免后续SQL的耗时错位"""
+        if context.connection is None:
+            return
+        starts = context.connection.info.get('metrics_query_start')
+        if starts:
+            starts.pop()
+
+    def render(self):
+        """Prometheus 文本格式"""
+        lines = []
+        for metric in (self.requests, self.latency, self.response_size,
+                       self.queries_per_request, self.query_latency, self.slow_queries):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def render_view(self):
+        return Response(self.render(), mimetype='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,103 @@
+"""
+进程内响应缓存
+按请求路径缓存接口响应体及其ETag，LRU淘汰，同时限制条目数和总字节数；
+每个条目属于一个标签，数据修改后按标签精确失效；
+max_entries 为 0 时不缓存任何响应，但仍生成ETag
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """线程安全的LRU响应缓存"""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, ttl=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()      # key -> (body, etag, tag, expires_at)
+        self._tag_keys = {}                # tag -> set(key)
+        self._tag_versions = {}            # tag -> 失效次数
+        self._size = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_etag(body):
+        """根据响应体内容生成ETag"""
+        return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    def tag_version(self, tag):
+        """返回标签当前版本号，生成响应前读取，写入时用于判断期间是否发生过失效"""
+        with self._lock:
+            return self._tag_versions.get(tag, 0)
+
+    @property
+    def enabled(self):
+        """是否启用缓存"""
+        return self.max_entries > 0
+
+    def get(self, key):
+        """命中时返回 (body, etag) 并将条目移到最近使用位置，未命中或已过期返回 None"""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[3] is not None and entry[3] < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key, body, tag, version):
+        """
+        写入缓存并返回 (body, etag)
+        若生成响应期间标签已被失效（版本号变化），只返回结果而不写入，避免缓存旧数据
+        """
+        etag = self.make_etag(body)
+        if not self.enabled or len(body) > self.max_bytes:
+            return body, etag
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            if self._tag_versions.get(tag, 0) != version:
+                return body, etag
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (body, etag, tag, expires_at)
+            self._tag_keys.setdefault(tag, set()).add(key)
+            self._size += len(body)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+        return body, etag
+
+    def invalidate(self, *tags):
+        """使指定标签下的所有缓存条目失效"""
+        with self._lock:
+            for tag in tags:
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+                for key in self._tag_keys.pop(tag, ()):
+                    self._remove(key)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for tag in list(self._tag_keys):
+                self._tag_versions[tag] = self._tag_versions.get(tag, 0) + 1
+            self._entries.clear()
+            self._tag_keys.clear()
+            self._size = 0
+
+    def _remove(self, key):
+        """删除单个条目（调用方需持有锁）"""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= len(entry[0])
+        keys = self._tag_keys.get(entry[2])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._tag_keys[entry[2]]
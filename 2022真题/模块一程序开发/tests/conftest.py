@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具
+make_app 在临时目录中创建使用独立SQLite数据库的应用，不影响 instance/ 下的数据
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, init_db
+
+@pytest.fixture
+def make_app(tmp_path):
+    """返回 make(db_path=None, init=True, **config)：创建应用，默认先初始化数据库"""
+    def make(db_path=None, init=True, **config):
+        db_path = db_path or str(tmp_path / 'employees.db')
+        app = create_app(dict({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f'sqlite:///{db_path}',
+            'SECRET_KEY': 'test-secret',
+            'PASSWORD_HASH_ITERATIONS': 1000,
+        }, **config))
+        if init:
+            init_db(app)
+        return app
+    return make
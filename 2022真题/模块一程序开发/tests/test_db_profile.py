@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+"""数据库引擎配置：内存数据库在各配置方案下都能使用"""
+
+import pytest
+
+from db_profile import SQLITE_PROFILES, engine_options, is_memory_database
+
+@pytest.mark.parametrize('uri', ['sqlite://', 'sqlite:///:memory:', 'sqlite:///file:test?mode=memory&uri=true'])
+def test_memory_database_has_no_pool_sizing(uri):
+    assert is_memory_database(uri)
+    options = engine_options('production', uri)
+    assert not {'pool_size', 'max_overflow', 'pool_timeout'} & set(options)
+
+def test_file_database_keeps_pool_sizing():
+    assert not is_memory_database('sqlite:///employees.db')
+    assert engine_options('production', 'sqlite:///employees.db')['pool_size'] == 10
+
+@pytest.mark.parametrize('profile', sorted(SQLITE_PROFILES))
+def test_app_runs_on_memory_database(make_app, profile):
+    app = make_app(SQLALCHEMY_DATABASE_URI='sqlite://', SQLITE_PROFILE=profile)
+    client = app.test_client()
+
+    response = client.post('/login', json={'username': 'admin', 'password': '123456'})
+
+    assert response.status_code == 200
+    assert client.get('/employees').get_json()['code'] == 200
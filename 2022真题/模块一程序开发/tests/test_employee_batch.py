@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""批量查询：ids 只接受整数"""
+
+import pytest
+
+def add_employees(app, count):
+    from app import db, Employee
+    with app.app_context():
+        db.session.execute(Employee.__table__.insert(), [{
+            'name': f'员工{i}', 'gender': '男', 'age': 30, 'department': '研发部', 'position': '工程师',
+            'phone': '13800138000', 'email': f'user{i}@example.com', 'hire_date': '2024-01-01'
+        } for i in range(count)])
+        db.session.commit()
+
+def test_valid_ids(make_app):
+    app = make_app()
+    add_employees(app, 2)
+    client = app.test_client()
+
+    responses = (client.get('/employees/batch?ids=1, 2,9,1'),
+                 client.post('/employees/batch', json={'ids': [1, 2, 9, 1]}))
+    for response in responses:
+        body = response.get_json()
+        assert response.status_code == 200
+        assert list(body['data']) == ['1', '2', '9']
+        assert body['data']['9'] is None
+        assert body['not_found'] == [9]
+
+@pytest.mark.parametrize('ids', [[True], [1.9], [1.0], ['1'], [None], [[1]]])
+def test_post_rejects_non_integer_ids(make_app, ids):
+    client = make_app().test_client()
+
+    response = client.post('/employees/batch', json={'ids': ids})
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == '参数错误：ids 必须为整数'
+
+@pytest.mark.parametrize('ids', ['1.9', '-1', '+1', 'true', '1e3', '１', '²'])
+def test_get_rejects_non_digit_ids(make_app, ids):
+    client = make_app().test_client()
+
+    response = client.get('/employees/batch', query_string={'ids': ids})
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == '参数错误：ids 必须为整数'
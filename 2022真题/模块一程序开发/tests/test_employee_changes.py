@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""员工变更增量同步：按提交顺序分页，旧数据库升级后的数据和旧版游标都能完整同步"""
+
+import base64
+import sqlite3
+
+from app import Employee, db
+
+# 新增 updated_at 列之前的员工表结构
+LEGACY_EMPLOYEES_DDL = """
+    CREATE TABLE employees (
+        id INTEGER NOT NULL PRIMARY KEY,
+        name VARCHAR(50) NOT NULL,
+        gender VARCHAR(10) NOT NULL,
+        age INTEGER NOT NULL,
+        department VARCHAR(50) NOT NULL,
+        position VARCHAR(50) NOT NULL,
+        phone VARCHAR(20) NOT NULL,
+        email VARCHAR(100),
+        hire_date VARCHAR(20) NOT NULL,
+        created_at DATETIME
+    )
+"""
+
+def create_legacy_db(path, rows):
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.execute(LEGACY_EMPLOYEES_DDL)
+        conn.executemany(
+            'INSERT INTO employees (id, name, gender, age, department, position, phone, email, hire_date, created_at) '
+            "VALUES (?, ?, '男', 30, '研发部', '工程师', '13800000000', NULL, '2024-01-01', ?)",
+            rows
+        )
+    conn.close()
+
+def add_employees(app, count):
+    with app.app_context():
+        for i in range(count):
+            db.session.add(Employee(name=f'员工{i}', gender='女', age=25, department='市场部', position='专员',
+                                    phone='13900000000', hire_date='2024-02-01'))
+        db.session.commit()
+
+def sync_all(client, limit=500, since=None):
+    """用 cursor 逐页拉取全部变更，返回 (员工id列表, 最后的cursor)"""
+    ids = []
+    params = {'limit': limit}
+    if since:
+        params['since'] = since
+    while True:
+        body = client.get('/employees/changes', query_string=params).get_json()
+        ids.extend(row['id'] for row in body['data'])
+        if not body['has_more']:
+            return ids, body['cursor']
+        params['since'] = body['cursor']
+
+def test_upgraded_rows_created_in_same_second_are_all_synced(make_app, tmp_path):
+    db_path = str(tmp_path / 'legacy.db')
+    # 同一秒内创建的7条旧数据
+    create_legacy_db(db_path, [(i, f'员工{i}', f'2024-01-01 12:00:00.{i:06d}') for i in range(1, 8)])
+
+    app = make_app(db_path)
+
+    assert sync_all(app.test_client(), limit=2)[0] == list(range(1, 8))
+
+def test_backfilled_updated_at_matches_orm_format(make_app, tmp_path):
+    db_path = str(tmp_path / 'legacy.db')
+    create_legacy_db(db_path, [(1, '员工1', '2024-01-01 12:00:00.500000'), (2, '员工2', None)])
+
+    make_app(db_path)
+
+    conn = sqlite3.connect(db_path)
+    values = [row[0] for row in conn.execute('SELECT updated_at FROM employees ORDER BY id')]
+    conn.close()
+    assert all(len(value) == len('2024-01-01 12:00:00.000000') for value in values)
+
+def test_change_with_older_timestamp_committed_later_is_synced(make_app):
+    app = make_app()
+    add_employees(app, 3)
+    client = app.test_client()
+    ids, cursor = sync_all(client)
+    assert ids == [1, 2, 3]
+
+    # updated_at 在Python中生成，等待写锁后才提交时可能早于已返回的游标
+    with app.app_context():
+        db.session.execute(db.text(
+            "UPDATE employees SET name = '改名', updated_at = '2000-01-01 00:00:00.000000' WHERE id = 1"
+        ))
+        db.session.commit()
+
+    assert sync_all(client, since=cursor)[0] == [1]
+
+def test_legacy_updated_at_cursor_is_accepted(make_app):
+    app = make_app()
+    add_employees(app, 3)
+    with app.app_context():
+        updated_at = db.session.get(Employee, 2).updated_at
+    legacy_cursor = base64.urlsafe_b64encode(f'{updated_at.isoformat()}|2'.encode('ascii')).decode('ascii')
+
+    assert sync_all(app.test_client(), since=legacy_cursor)[0] == [3]
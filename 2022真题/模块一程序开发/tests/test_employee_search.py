@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+"""员工全文检索：1~2个字符的短词走两字索引，其他程序直接修改员工表时索引同样同步"""
+
+import sqlite3
+
+from app import Employee, db
+
+EMPLOYEES = [
+    ('张三', '研发部', '工程师', 'zhangsan@example.com'),
+    ('张三丰', '市场部', '经理', 'sanfeng@example.com'),
+    ('李四', '研发部', '专员', 'lisi@example.com'),
+]
+
+def search_ids(client, q):
+    body = client.get('/employees/search', query_string={'q': q, 'fields': 'id'}).get_json()
+    return sorted(row['id'] for row in body['data'])
+
+def create_app_with_employees(make_app):
+    app = make_app()
+    with app.app_context():
+        for name, department, position, email in EMPLOYEES:
+            db.session.add(Employee(name=name, gender='男', age=30, department=department, position=position,
+                                    phone='13800000000', email=email, hire_date='2024-01-01'))
+        db.session.commit()
+    return app
+
+def test_short_terms(make_app):
+    client = create_app_with_employees(make_app).test_client()
+
+    assert search_ids(client, '张三') == [1, 2]
+    assert search_ids(client, '张') == [1, 2]
+    assert search_ids(client, '三 研发') == [1]
+    assert search_ids(client, 'LI') == [3]
+    assert search_ids(client, 'n@') == [1]
+    assert search_ids(client, '研发部 四') == [3]
+    assert search_ids(client, '王') == []
+
+def test_writes_from_plain_sqlite3_keep_index_in_sync(make_app, tmp_path):
+    client = create_app_with_employees(make_app).test_client()
+
+    # 不经过应用（没有应用注册的任何自定义SQL函数）直接修改员工表
+    conn = sqlite3.connect(str(tmp_path / 'employees.db'))
+    with conn:
+        conn.execute("UPDATE employees SET name = '王五' WHERE id = 1")
+        conn.execute('DELETE FROM employees WHERE id = 3')
+        conn.execute("INSERT INTO employees (name, gender, age, department, position, phone, hire_date) "
+                     "VALUES ('王二', '女', 28, '人事部', '专员', '13700000000', '2024-03-01')")
+    conn.close()
+
+    # 删除后新增的员工复用了id 3
+    assert search_ids(client, '王') == [1, 3]
+    assert search_ids(client, '王二') == [3]
+    assert search_ids(client, '张三') == [2]
+    assert search_ids(client, '李四') == []
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""监控指标：流式响应的查询计入请求，SQL出错后耗时统计不错位"""
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+def seed(app, count):
+    from app import db, Employee
+    with app.app_context():
+        db.session.execute(Employee.__table__.insert(), [{
+            'name': f'员工{i}', 'gender': '男', 'age': 30, 'department': '研发部', 'position': '工程师',
+            'phone': '13800138000', 'email': f'user{i}@example.com', 'hire_date': '2024-01-01'
+        } for i in range(count)])
+        db.session.commit()
+
+def query_count(metrics, rule):
+    """返回某个接口 GET 请求的 (请求次数, SQL总条数)"""
+    _, total, count = metrics.queries_per_request._values[(rule, 'GET')]
+    return count, total
+
+@pytest.mark.parametrize('path, rule', [
+    ('/employees?stream=ndjson', '/employees'),
+    ('/employees/export?format=csv', '/employees/export'),
+])
+def test_streamed_response_counts_queries(make_app, path, rule):
+    app = make_app(METRICS_ENABLED=True, EMPLOYEES_STREAM_CHUNK=10, EMPLOYEE_EXPORT_BATCH=10)
+    seed(app, 35)
+    metrics = app.extensions['metrics']
+    client = app.test_client()
+    token = client.post('/login', json={'username': 'admin', 'password': '123456'}).get_json()['data']['token']
+
+    response = client.get(path, headers={'Authorization': 'Bearer ' + token})
+    assert response.status_code == 200
+    response.get_data()
+    response.close()
+
+    count, total = query_count(metrics, rule)
+    assert count == 1
+    assert total >= 1
+    if rule == '/employees':
+        # 35条按每批10条读取，至少4次查询
+        assert total >= 4
+    assert metrics.requests._values[(rule, 'GET', '200')] == 1
+
+def test_failed_query_does_not_leave_start_time(make_app):
+    app = make_app(METRICS_ENABLED=True)
+    from app import db
+    with app.app_context():
+        with db.engine.connect() as conn:
+            with pytest.raises(OperationalError):
+                conn.execute(text('SELECT * FROM no_such_table'))
+            assert not conn.info.get('metrics_query_start')
+            conn.execute(text('SELECT 1'))
+            assert not conn.info.get('metrics_query_start')
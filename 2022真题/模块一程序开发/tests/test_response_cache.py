@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+"""读接口响应缓存：RESPONSE_CACHE_MAX_ENTRIES=0 时关闭缓存"""
+
+def test_disabled_cache_reads_database_every_time(make_app):
+    app = make_app(RESPONSE_CACHE_MAX_ENTRIES=0)
+    client = app.test_client()
+    cache = app.extensions['response_cache']
+
+    first = client.get('/employees')
+    assert first.get_json()['data'] == []
+    assert not cache._entries
+
+    # 直接写库不会失效缓存，关闭缓存后仍能读到新数据
+    with app.app_context():
+        from app import db, Employee
+        db.session.execute(Employee.__table__.insert(), [{
+            'name': '张三', 'gender': '男', 'age': 30, 'department': '研发部', 'position': '工程师',
+            'phone': '13800138000', 'email': 'zs@example.com', 'hire_date': '2024-01-01'
+        }])
+        db.session.commit()
+    second = client.get('/employees')
+    assert [row['name'] for row in second.get_json()['data']] == ['张三']
+    assert not cache._entries
+
+    # ETag 和 304 仍然有效
+    assert client.get('/employees', headers={'If-None-Match': second.headers['ETag'].strip('"')}).status_code == 304
+
+def test_enabled_cache_serves_stored_response(make_app):
+    app = make_app()
+    client = app.test_client()
+
+    client.get('/employees')
+    assert len(app.extensions['response_cache']._entries) == 1
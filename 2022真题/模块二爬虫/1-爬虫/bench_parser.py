@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+"""
+列表页解析器性能测试
+对保存下来的Top250列表页逐个后端重复解析，输出每个后端的解析速度（书籍条数/秒），
+并检查各后端的解析结果是否与 html.parser 完全一致（JSON格式）
+
+网页来源（二选一）：
+    --fixtures DIR   目录下的 *.html 文件，默认为本目录下的 fixtures（随代码保存的Top250列表页样例）
+    --cache-dir DIR  爬虫HTTP缓存中的Top250列表页（如 ./data/http_cache，先运行一次 book_spider.py 即可）
+
+用法：
+    python 1-爬虫/bench_parser.py
+    python 1-爬虫/bench_parser.py --cache-dir ./data/http_cache --seconds 5 --output result.json
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+from book_parser import PARSER_BACKENDS
+from http_cache import HttpCache
+
+DEFAULT_FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def load_pages(args):
+    """读取待解析的网页内容列表"""
+    if not args.cache_dir:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(args.fixtures, '*.html'))):
+            with open(path, encoding='utf-8') as f:
+                pages.append(f.read())
+        return pages
+    if not os.path.isdir(args.cache_dir):
+        return []
+    cache = HttpCache(args.cache_dir)
+    return [body.decode('utf-8', errors='replace')
+            for url, body in cache.iter_entries() if args.url_filter in url]
+
+def run_backend(parse, pages, seconds):
+    """反复解析全部页面至少 seconds 秒，返回统计结果"""
+    items = 0
+    rounds = 0
+    start = time.perf_counter()
+    while True:
+        for html in pages:
+            items += len(parse(html))
+        rounds += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            break
+    return {
+        'rounds': rounds,
+        'items': items,
+        'seconds': round(elapsed, 3),
+        'items_per_second': round(items / elapsed, 1),
+        'ms_per_page': round(elapsed / (rounds * len(pages)) * 1000, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='列表页解析器性能测试')
+    parser.add_argument('--fixtures', default=DEFAULT_FIXTURES, help='保存的HTML文件目录（*.html）')
+    parser.add_argument('--cache-dir', help='改为读取爬虫HTTP缓存目录中的页面')
+    parser.add_argument('--url-filter', default='top250', help='从缓存中选取URL包含该字符串的页面')
+    parser.add_argument('--backends', default=','.join(PARSER_BACKENDS),
+                        help=f'要测试的解析器，逗号分隔，可选：{",".join(PARSER_BACKENDS)}')
+    parser.add_argument('--seconds', type=float, default=3, help='每个解析器的测试时长（秒）')
+    parser.add_argument('--output', help='结果写入的JSON文件，默认输出到标准输出')
+    args = parser.parse_args()
+
+    backends = args.backends.split(',')
+    invalid = [backend for backend in backends if backend not in PARSER_BACKENDS]
+    if invalid:
+        parser.error(f'未知解析器：{", ".join(invalid)}')
+
+    pages = load_pages(args)
+    if not pages:
+        parser.error('没有找到可解析的网页，请检查 --fixtures 目录，或先运行 book_spider.py 生成 --cache-dir 缓存')
+
+    # 以 html.parser 的结果为准，检查其他后端输出是否一致
+    expected = [PARSER_BACKENDS['html.parser'](html) for html in pages]
+    results = {
+        'config': {'pages': len(pages), 'items_per_round': sum(len(records) for records in expected)},
+        'backends': {}
+    }
+    for backend in backends:
+        parse = PARSER_BACKENDS[backend]
+        print(f'测试 {backend}...', file=sys.stderr)
+        mismatched = sum(1 for html, want in zip(pages, expected) if parse(html) != want)
+        result = run_backend(parse, pages, args.seconds)
+        result['mismatched_pages'] = mismatched
+        results['backends'][backend] = result
+
+    output = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
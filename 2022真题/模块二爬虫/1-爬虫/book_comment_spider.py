@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+书籍短评爬虫
+从豆瓣Top250列表页的每本书（tr.item）出发，依次爬取书籍详情页和短评页，
+输出与 book_comments.csv 相同格式的评论数据：书名,作者,标题,内容,评分,日期
+    作者  评论者昵称
+    标题  评论者给出的评价等级（力荐/推荐/还行/较差/很差）
+    评分  评论星级，如 5星；评论者未打分时为空（数据清洗时按均值填充）
+
+程序分为 获取 → 解析 → 写入 三个阶段，各阶段由独立线程运行，阶段之间用有界队列连接：
+网络请求不必等待解析和写文件，解析或磁盘较慢时队列积压有上限，内存占用不会无限增长
+"""
+
+import argparse
+import csv
+import os
+import queue
+import re
+import threading
+import time
+from urllib.parse import urljoin
+
+from lxml import etree
+import lxml.html
+
+from book_spider import PAGE_COUNT, build_page_urls, create_session, get_book_data, url
+from http_cache import HttpCache
+from throttle import Throttle
+
+FIELDNAMES = ['书名', '作者', '标题', '内容', '评分', '日期']
+
+# 每页短评数
+COMMENTS_PER_PAGE = 20
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+BOOK_LINK_XPATH = etree.XPath(f"//tr[{_has_class('item')}]//div[{_has_class('pl2')}]//a[@href][1]")
+BOOK_TITLE_XPATH = etree.XPath("//span[@property='v:itemreviewed']")
+COMMENT_ITEM_XPATH = etree.XPath(f"//li[{_has_class('comment-item')}]")
+COMMENT_USER_XPATH = etree.XPath(f".//span[{_has_class('comment-info')}]/a[1]")
+COMMENT_STARS_XPATH = etree.XPath(f".//span[{_has_class('user-stars')}]")
+COMMENT_TIME_XPATH = etree.XPath(f".//*[{_has_class('comment-time')}]")
+COMMENT_CONTENT_XPATH = etree.XPath(f".//span[{_has_class('short')}]")
+STARS_PATTERN = re.compile(r'allstar(\d)0')
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+def parse_book_links(html):
+    """解析列表页，返回 [(书名, 详情页URL), ...]"""
+    root = lxml.html.fromstring(html)
+    links = []
+    for link in BOOK_LINK_XPATH(root):
+        title = (link.get('title') or link.text_content()).strip()
+        links.append((title, link.get('href')))
+    return links
+
+def parse_book_title(html):
+    """解析详情页中的书名，找不到时返回 None"""
+    titles = BOOK_TITLE_XPATH(lxml.html.fromstring(html))
+    return titles[0].text_content().strip() if titles else None
+
+def _first_text(elements):
+    return elements[0].text_content().strip() if elements else ''
+
+def parse_comments(html, book_name):
+    """解析短评页，返回评论记录列表"""
+    comments = []
+    for item in COMMENT_ITEM_XPATH(lxml.html.fromstring(html)):
+        content = _first_text(COMMENT_CONTENT_XPATH(item))
+        if not content:
+            continue
+        stars = COMMENT_STARS_XPATH(item)
+        match = STARS_PATTERN.search(stars[0].get('class', '')) if stars else None
+        date = DATE_PATTERN.search(_first_text(COMMENT_TIME_XPATH(item)))
+        comments.append({
+            '书名': book_name,
+            '作者': _first_text(COMMENT_USER_XPATH(item)),
+            '标题': stars[0].get('title', '').strip() if stars else '',
+            '内容': ' '.join(content.split()),
+            '评分': f'{match.group(1)}星' if match else '',
+            '日期': date.group(0) if date else ''
+        })
+    return comments
+
+def comment_page_urls(detail_url, pages):
+    """书籍短评页URL（按热度排序），每页20条"""
+    base = urljoin(detail_url if detail_url.endswith('/') else detail_url + '/', 'comments/')
+    return [f'{base}?start={i * COMMENTS_PER_PAGE}&limit={COMMENTS_PER_PAGE}&status=P&sort=score'
+            for i in range(pages)]
+
+class CommentPipeline:
+    """
+    获取 → 解析 → 写入 流水线
+    任务格式：(类型, URL, 书名)，类型为 list / detail / comments
+    一个任务在解析完成（其派生的新任务已入队）后才算完成，所有任务完成即爬取结束；
+    任何一个任务出错都会标记为完成，写入阶段出错后继续取出评论直到结束，保证流水线总能停止
+    """
+
+    def __init__(self, session, cache, throttle, output, fetch_workers=4, parse_workers=1,
+                 queue_size=64, books=None, comment_pages=1):
+        self.session = session
+        self.cache = cache
+        self.throttle = throttle
+        self.output = output
+        self.fetch_workers = fetch_workers
+        self.parse_workers = parse_workers
+        self.books = books
+        self.comment_pages = comment_pages
+        # 待获取任务不设上限：解析阶段向其中添加新任务，设上限可能与获取阶段互相等待
+        self.fetch_queue = queue.Queue()
+        self.parse_queue = queue.Queue(maxsize=queue_size)
+        self.write_queue = queue.Queue(maxsize=queue_size * COMMENTS_PER_PAGE)
+        self.stats = {'pages': 0, 'failed': 0, 'books': 0, 'comments': 0}
+        self.write_error = None
+        self._lock = threading.Lock()
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    def fetch_stage(self):
+        while True:
+            task = self.fetch_queue.get()
+            if task is None:
+                return
+            # 交给解析阶段后由解析阶段标记任务完成，否则（获取失败或出错）在这里标记
+            handed_off = False
+            try:
+                html = get_book_data(task[1], self.session, self.cache, self.throttle)
+                if html is None:
+                    self._count('failed')
+                else:
+                    self._count('pages')
+                    self.parse_queue.put((task, html))
+                    handed_off = True
+            except Exception as e:
+                print(f"获取页面出错 {task[1]}: {e}")
+                self._count('failed')
+            finally:
+                if not handed_off:
+                    self.fetch_queue.task_done()
+
+    def parse_stage(self):
+        while True:
+            item = self.parse_queue.get()
+            if item is None:
+                return
+            (kind, page_url, book_name), html = item
+            try:
+                if kind == 'list':
+                    for title, detail_url in parse_book_links(html):
+                        if not self._claim_book():
+                            break
+                        self.fetch_queue.put(('detail', urljoin(page_url, detail_url), title))
+                elif kind == 'detail':
+                    book_name = parse_book_title(html) or book_name
+                    for comments_url in comment_page_urls(page_url, self.comment_pages):
+                        self.fetch_queue.put(('comments', comments_url, book_name))
+                else:
+                    for comment in parse_comments(html, book_name):
+                        self.write_queue.put(comment)
+            except Exception as e:
+                print(f"解析页面出错 {page_url}: {e}")
+            finally:
+                self.fetch_queue.task_done()
+
+    def _claim_book(self):
+        """限制爬取的书籍数量，达到 books 后不再展开新的书"""
+        with self._lock:
+            if self.books is not None and self.stats['books'] >= self.books:
+                return False
+            self.stats['books'] += 1
+            return True
+
+    def write_stage(self):
+        finished = False
+        try:
+            with open(self.output, 'w', encoding='utf-8-sig', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=FIELDNAMES)
+                writer.writeheader()
+                while True:
+                    comment = self.write_queue.get()
+                    if comment is None:
+                        finished = True
+                        return
+                    writer.writerow(comment)
+                    self._count('comments')
+                    if self.write_queue.empty():
+                        f.flush()
+        except Exception as e:
+            print(f"写入评论出错 {self.output}: {e}")
+            self.write_error = e
+            # 继续取出评论直到结束标记，避免解析阶段阻塞在已满的写入队列上
+            while not finished and self.write_queue.get() is not None:
+                pass
+
+    def run(self, list_urls):
+        """运行流水线直到所有任务完成，返回统计信息；写入阶段出错时在各阶段停止后抛出该异常"""
+        for page_url in list_urls:
+            self.fetch_queue.put(('list', page_url, None))
+        fetchers = [threading.Thread(target=self.fetch_stage, daemon=True) for _ in range(self.fetch_workers)]
+        parsers = [threading.Thread(target=self.parse_stage, daemon=True) for _ in range(self.parse_workers)]
+        writer = threading.Thread(target=self.write_stage, daemon=True)
+        for thread in fetchers + parsers + [writer]:
+            thread.start()
+
+        # 所有任务（包括解析中派生的任务）完成后依次停止各阶段
+        self.fetch_queue.join()
+        for _ in fetchers:
+            self.fetch_queue.put(None)
+        for _ in parsers:
+            self.parse_queue.put(None)
+        for thread in fetchers + parsers:
+            thread.join()
+        self.write_queue.put(None)
+        writer.join()
+        if self.write_error is not None:
+            raise self.write_error
+        return self.stats
+
+def main():
+    parser = argparse.ArgumentParser(description='爬取豆瓣Top250书籍的真实短评')
+    parser.add_argument('--url', default=url, help='Top250列表页URL')
+    parser.add_argument('--pages', type=int, default=PAGE_COUNT, help='爬取的列表页数')
+    parser.add_argument('--books', type=int, help='最多爬取的书籍数，默认不限')
+    parser.add_argument('--comment-pages', type=int, default=1, help='每本书爬取的短评页数（每页20条）')
+    parser.add_argument('--workers', type=int, default=4, help='获取阶段的最大并发请求数')
+    parser.add_argument('--parsers', type=int, default=1, help='解析阶段的线程数')
+    parser.add_argument('--queue-size', type=int, default=64, help='待解析页面队列的上限')
+    parser.add_argument('--rate', type=float, default=2, help='初始请求速率（次/秒）')
+    parser.add_argument('--max-rate', type=float, default=10, help='速率自适应上调的上限（次/秒）')
+    parser.add_argument('--cache-dir', default='./data/http_cache', help='HTTP缓存目录')
+    parser.add_argument('--no-cache', action='store_true', help='不使用HTTP缓存')
+    parser.add_argument('--output', default='./data/book_comments.csv', help='输出CSV文件')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("爬取书籍短评数据")
+    print("=" * 60)
+
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    cache = None if args.no_cache else HttpCache(args.cache_dir)
+    throttle = Throttle(rate=args.rate, max_rate=max(args.rate, args.max_rate), concurrency=args.workers)
+    start = time.perf_counter()
+    with create_session(args.workers) as session:
+        pipeline = CommentPipeline(session, cache, throttle, args.output, args.workers, args.parsers,
+                                   args.queue_size, args.books, args.comment_pages)
+        stats = pipeline.run(build_page_urls(args.url, args.pages))
+
+    print(f"获取 {stats['pages']} 个页面（失败 {stats['failed']} 个），{stats['books']} 本书，"
+          f"共 {stats['comments']} 条评论，耗时 {time.perf_counter() - start:.2f} 秒（{throttle.describe()}）")
+    print(f"评论数据已保存到: {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Top250列表页解析器
+提供两种后端，输出完全一致：
+    html.parser  BeautifulSoup + Python内置解析器，纯Python实现
+    lxml         lxml解析，预编译XPath表达式，速度快得多（未安装lxml时不可用）
+
+每个后端接收网页内容，返回书籍记录列表，每条记录包含：
+    book_id  稳定的书籍ID：豆瓣书籍链接中的 subject 编号，没有链接时为书名和图片链接的哈希
+    name     书名
+    rating   评分，没有评分时为“暂无评分”
+    image    封面图片链接，没有图片时为“无图片”
+    url      书籍详情页链接
+一本书的各字段要么全部解析成功，要么整条跳过，不会出现字段错位
+"""
+
+import hashlib
+import re
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml import etree
+except ImportError:
+    lxml = None
+
+SUBJECT_ID_PATTERN = re.compile(r'/subject/(\d+)')
+
+def make_book_id(link, name, image):
+    """生成稳定的书籍ID"""
+    match = SUBJECT_ID_PATTERN.search(link or '')
+    if match:
+        return match.group(1)
+    return 'h' + hashlib.sha1(f'{name}\n{image}'.encode('utf-8')).hexdigest()[:16]
+
+def make_record(name, rating, image, link):
+    return {
+        'book_id': make_book_id(link, name, image),
+        'name': name,
+        'rating': rating,
+        'image': image,
+        'url': link or ''
+    }
+
+def parse_with_html_parser(html):
+    """BeautifulSoup + html.parser 解析"""
+    soup = BeautifulSoup(html, 'html.parser')
+
+    records = []
+
+    # 任务点4：查找书籍信息元素
+    # 豆瓣Top250使用tr.item结构
+    book_items = soup.find_all('tr', class_='item')
+
+    for item in book_items:  # 爬取所有找到的书籍
+        try:
+            # 提取书籍名称
+            title_div = item.find('div', class_='pl2')
+            if title_div:
+                title_link = title_div.find('a')
+                if title_link:
+                    title = title_link.get('title', '').strip()
+                    if not title:
+                        title = title_link.get_text().strip()
+                else:
+                    continue
+            else:
+                continue
+
+            # 提取书籍评分
+            rating_element = item.find('span', class_='rating_nums')
+            if rating_element:
+                rating = rating_element.get_text().strip()
+            else:
+                rating = "暂无评分"
+
+            # 提取书籍图片链接
+            img_element = item.find('img')
+            if img_element and img_element.get('src'):
+                img_url = img_element.get('src')
+            else:
+                img_url = "无图片"
+
+            records.append(make_record(title, rating, img_url, title_link.get('href')))
+
+        except Exception as e:
+            print(f"解析书籍信息出错: {e}")
+            continue
+
+    return records
+
+def _has_class(name):
+    """XPath条件：class属性包含指定类名（与BeautifulSoup的 class_ 匹配规则一致）"""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+if lxml is not None:
+    # 表达式只编译一次，解析每个页面时直接复用
+    ITEMS_XPATH = etree.XPath(f"//tr[{_has_class('item')}]")
+    TITLE_LINK_XPATH = etree.XPath(f"(.//div[{_has_class('pl2')}])[1]//a")
+    RATING_XPATH = etree.XPath(f".//span[{_has_class('rating_nums')}]")
+    IMAGE_XPATH = etree.XPath(".//img")
+
+def parse_with_lxml(html):
+    """lxml + 预编译XPath 解析"""
+    root = lxml.html.fromstring(html)
+
+    records = []
+
+    for item in ITEMS_XPATH(root):
+        try:
+            # 提取书籍名称：第一个 div.pl2 下的第一个链接
+            title_links = TITLE_LINK_XPATH(item)
+            if not title_links:
+                continue
+            title = (title_links[0].get('title') or '').strip()
+            if not title:
+                title = title_links[0].text_content().strip()
+
+            # 提取书籍评分
+            ratings = RATING_XPATH(item)
+            rating = ratings[0].text_content().strip() if ratings else "暂无评分"
+
+            # 提取书籍图片链接
+            images = IMAGE_XPATH(item)
+            img_url = images[0].get('src') if images and images[0].get('src') else "无图片"
+
+            records.append(make_record(title, rating, img_url, title_links[0].get('href')))
+
+        except Exception as e:
+            print(f"解析书籍信息出错: {e}")
+            continue
+
+    return records
+
+PARSER_BACKENDS = {'html.parser': parse_with_html_parser}
+if lxml is not None:
+    PARSER_BACKENDS['lxml'] = parse_with_lxml
+
+DEFAULT_BACKEND = 'lxml' if lxml is not None else 'html.parser'
@@ -5,11 +5,22 @@
 """
 
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+import argparse
+import multiprocessing
 import os
 import time
 import random
 
+from book_parser import DEFAULT_BACKEND, PARSER_BACKENDS
+from crawl_state import CrawlState
+from http_cache import HttpCache
+from image_downloader import download_images
+from record_store import RECORD_STORES, open_record_store
+from throttle import RETRY_STATUS, Throttle, backoff_delay, parse_retry_after
+
 # 任务点1：设置请求头，模拟浏览器访问
 headers = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -22,6 +33,10 @@ headers = {
 # 目标网站URL - 豆瓣Top250
 url = 'https://book.douban.com/top250'
 
+# Top250共10页，每页25本，通过 ?start= 参数翻页
+PAGE_COUNT = 10
+PAGE_SIZE = 25
+
 def create_directories():
     """创建保存数据的目录"""
     directories = [
@@ -34,73 +49,169 @@ def create_directories():
             os.makedirs(directory)
             print(f"创建目录: {directory}")
 
-def get_book_data(url):
+def create_session(pool_size=4):
+    """
+    创建带连接池的会话
+    多个线程共用同一个会话，请求之间复用长连接，不再每次重新建立TCP/TLS连接
+    """
+    session = requests.Session()
+    session.headers.update(headers)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def build_page_urls(list_url, pages=PAGE_COUNT):
+    """生成列表各页的URL：start=0, 25, 50, ..."""
+    separator = '&' if '?' in list_url else '?'
+    return [f'{list_url}{separator}start={i * PAGE_SIZE}' for i in range(pages)]
+
+def get_book_data(url, session=None, cache=None, throttle=None, retries=3):
     """
     任务点2：发送HTTP请求获取网页内容
+    传入 session 时使用其连接池，否则单独发送一次请求；
+    传入 cache 时优先使用未过期的缓存，过期的缓存通过条件请求重新验证；
+    传入 throttle 时按域名限速并自适应调整并发数；
+    429/5xx/超时按指数退避重试 retries 次
     """
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        response.encoding = 'utf-8'
-        if response.status_code == 200:
-            return response.text
-        else:
-            print(f"请求失败，状态码: {response.status_code}")
+    entry = cache.get(url) if cache else None
+    if entry and cache.is_fresh(entry):
+        cache.record('hit')
+        return entry.body.decode('utf-8', errors='replace')
+    request_headers = dict(headers, **cache.conditional_headers(entry)) if entry else headers
+    for attempt in range(retries + 1):
+        response = None
+        try:
+            with throttle.slot(url) if throttle else nullcontext():
+                response = (session or requests).get(url, headers=request_headers, timeout=10)
+        except (requests.Timeout, requests.ConnectionError) as e:
+            error = e
+        except Exception as e:
+            print(f"请求出错: {e}")
             return None
-    except Exception as e:
-        print(f"请求出错: {e}")
+        status = response.status_code if response is not None else None
+        if throttle:
+            throttle.report(url, status)
+        if status is not None and status not in RETRY_STATUS:
+            break
+        if attempt < retries:
+            retry_after = parse_retry_after(response.headers.get('Retry-After')) if response is not None else None
+            time.sleep(backoff_delay(attempt, retry_after=retry_after))
+    
+    if response is None:
+        print(f"请求出错: {error}")
         return None
+    response.encoding = 'utf-8'
+    if response.status_code == 304 and entry:
+        cache.refresh(url, entry, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        cache.record('revalidated')
+        return entry.body.decode('utf-8', errors='replace')
+    if response.status_code == 200:
+        if cache:
+            cache.put(url, response.content, response.headers.get('ETag'),
+                      response.headers.get('Last-Modified'))
+            cache.record('miss')
+        return response.text
+    else:
+        print(f"请求失败，状态码: {response.status_code}")
+        return None
+
+def parse_book_records(html, backend=DEFAULT_BACKEND):
+    """
+    解析HTML，返回书籍记录列表（book_id, name, rating, image, url）
+    backend 选择解析器：lxml（预编译XPath，默认）或 html.parser（纯Python），两者结果一致
+    """
+    return PARSER_BACKENDS[backend](html)
 
-def parse_book_info(html):
+def parse_book_info(html, backend=DEFAULT_BACKEND):
     """
     任务点3：解析HTML，提取书籍信息
+    返回 (书名列表, 评分列表, 图片链接列表)，三个列表按书籍一一对应
     """
-    soup = BeautifulSoup(html, 'html.parser')
-    
-    books_name = []
-    books_rating = []
-    books_image = []
-    
-    # 任务点4：查找书籍信息元素
-    # 豆瓣Top250使用tr.item结构
-    book_items = soup.find_all('tr', class_='item')
-    
-    for item in book_items:  # 爬取所有找到的书籍
-        try:
-            # 提取书籍名称
-            title_div = item.find('div', class_='pl2')
-            if title_div:
-                title_link = title_div.find('a')
-                if title_link:
-                    title = title_link.get('title', '').strip()
-                    if not title:
-                        title = title_link.get_text().strip()
-                    books_name.append(title)
-                else:
+    records = parse_book_records(html, backend)
+    return ([record['name'] for record in records], [record['rating'] for record in records],
+            [record['image'] for record in records])
+
+def crawl_page(page_url, state, session, cache=None, throttle=None, backend=DEFAULT_BACKEND):
+    """
+    获取并解析一个列表页，结果立即写入爬取进度 state
+    获取失败或解析不到书籍（如被封禁返回验证页）的页面标记为失败，下次运行时重试；
+    解析不到书籍的页面同时从缓存中删除，重试时重新下载而不是读到缓存的验证页
+    """
+    html = get_book_data(page_url, session, cache, throttle)
+    if not html:
+        print(f"无法获取网页内容: {page_url}")
+        state.fail(page_url, '无法获取网页内容')
+        return False
+    records = parse_book_records(html, backend)
+    if not records:
+        print(f"未解析到书籍信息: {page_url}")
+        if cache:
+            cache.delete(page_url)
+        state.fail(page_url, '未解析到书籍信息')
+        return False
+    state.complete(page_url, records)
+    return True
+
+def crawl_to_state(urls, state, session, workers=4, cache=None, throttle=None, backend=DEFAULT_BACKEND):
+    """
+    并发爬取 urls 中尚未完成的页面，每个页面解析后立即写入爬取进度 state
+    返回 (本次完成的页面数, 本次需要爬取的页面数)
+    """
+    state.add_urls(urls)
+    pending = state.pending(urls)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        crawled = executor.map(lambda page_url: crawl_page(page_url, state, session, cache, throttle, backend), pending)
+        return sum(crawled), len(pending)
+
+def create_cache(args):
+    """根据命令行参数创建HTTP缓存，--no-cache 时返回 None"""
+    if args.no_cache:
+        return None
+    return HttpCache(args.cache_dir, args.cache_ttl, int(args.cache_max_mb * 1024 * 1024))
+
+def run_worker(worker_id, args, processes):
+    """
+    工作进程：各线程从共享队列（爬取进度库）逐个租用URL，获取、解析并写入结果，
+    直到没有可租用的URL且其他进程的租约全部结束
+    每个进程使用自己的连接、会话和缓存对象，限速按进程数平分
+    """
+    cache = create_cache(args)
+    throttle = Throttle(rate=args.rate / processes, max_rate=max(args.rate, args.max_rate) / processes,
+                        concurrency=args.workers)
+    with CrawlState(args.state) as state, create_session(args.workers) as session:
+        def worker_thread(thread_id):
+            owner = f'{worker_id}-{thread_id}'
+            crawled = 0
+            while True:
+                page_url = state.lease(owner, args.lease_seconds)
+                if page_url is None:
+                    if not state.has_leases():
+                        return crawled
+                    # 其他进程的URL仍在处理中，或等待异常退出进程的租约到期
+                    time.sleep(1)
                     continue
-            else:
-                continue
-            
-            # 提取书籍评分
-            rating_element = item.find('span', class_='rating_nums')
-            if rating_element:
-                rating = rating_element.get_text().strip()
-            else:
-                rating = "暂无评分"
-            books_rating.append(rating)
-            
-            # 提取书籍图片链接
-            img_element = item.find('img')
-            if img_element and img_element.get('src'):
-                img_url = img_element.get('src')
-            else:
-                img_url = "无图片"
-            books_image.append(img_url)
-            
-        except Exception as e:
-            print(f"解析书籍信息出错: {e}")
-            continue
-    
-    return books_name, books_rating, books_image
+                crawled += crawl_page(page_url, state, session, cache, throttle, args.parser)
+
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            crawled = sum(executor.map(worker_thread, range(args.workers)))
+    print(f"工作进程 {worker_id} 完成 {crawled} 个页面（{throttle.describe()}）")
+
+def crawl_with_processes(urls, state, args):
+    """
+    多进程爬取：把 urls 放入共享队列，启动 args.processes 个工作进程
+    返回 (本次完成的页面数, 本次需要爬取的页面数)
+    """
+    state.add_urls(urls)
+    pending = state.pending(urls)
+    state.requeue(pending)
+    workers = [multiprocessing.Process(target=run_worker, args=(f'worker{i}-{os.getpid()}', args, args.processes))
+               for i in range(args.processes)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return len(pending) - len(state.pending(urls)), len(pending)
 
 def save_to_file(data, filepath):
     """
@@ -116,6 +227,33 @@ def save_to_file(data, filepath):
 
 def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='爬取豆瓣Top250书籍数据')
+    parser.add_argument('--url', action='append', dest='urls',
+                        help=f'列表页URL，可多次指定，默认 {url}')
+    parser.add_argument('--pages', type=int, default=PAGE_COUNT, help='每个列表爬取的页数')
+    parser.add_argument('--workers', type=int, default=4, help='最大并发请求数')
+    parser.add_argument('--rate', type=float, default=2, help='每个域名的初始请求速率（次/秒）')
+    parser.add_argument('--max-rate', type=float, default=10, help='速率自适应上调的上限（次/秒）')
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=DEFAULT_BACKEND,
+                        help='HTML解析器')
+    parser.add_argument('--cache-dir', default='./data/http_cache', help='HTTP缓存目录')
+    parser.add_argument('--cache-ttl', type=float, default=24 * 3600,
+                        help='缓存有效期（秒），过期后向服务器重新验证')
+    parser.add_argument('--cache-max-mb', type=float, default=200, help='缓存总大小上限（MB）')
+    parser.add_argument('--no-cache', action='store_true', help='不使用HTTP缓存')
+    parser.add_argument('--state', default='./data/crawl_state.db', help='爬取进度数据库')
+    parser.add_argument('--restart', action='store_true', help='清空爬取进度，从头开始')
+    parser.add_argument('--processes', type=int, default=1,
+                        help='工作进程数，大于1时多个进程共享爬取进度库中的任务队列')
+    parser.add_argument('--lease-seconds', type=float, default=120,
+                        help='多进程模式下URL租约时长（秒），进程异常退出后其URL在租约到期后重新分配')
+    parser.add_argument('--output', default='./data/books.jsonl',
+                        help='书籍记录文件，只追加新增或有变化的书籍；.db 扩展名默认使用SQLite')
+    parser.add_argument('--store', choices=sorted(RECORD_STORES), help='记录存储格式，默认按 --output 扩展名判断')
+    parser.add_argument('--download-images', action='store_true',
+                        help='爬取完成后并发下载封面图片到 ./data/书籍封面')
+    args = parser.parse_args()
+
     print("=" * 50)
     print("开始爬取书籍数据...")
     print("=" * 50)
@@ -123,28 +261,66 @@ def main():
     # 创建保存目录
     create_directories()
     
-    # 获取网页内容
-    html = get_book_data(url)
+    # 并发获取尚未完成的列表页，共用一个带连接池的会话，每页完成后立即保存进度
+    page_urls = []
+    for list_url in args.urls or [url]:
+        page_urls.extend(build_page_urls(list_url, args.pages))
+    start = time.perf_counter()
+    with CrawlState(args.state) as state:
+        if args.restart:
+            state.reset()
+        if args.processes > 1:
+            done, pending = crawl_with_processes(page_urls, state, args)
+        else:
+            cache = create_cache(args)
+            throttle = Throttle(rate=args.rate, max_rate=max(args.rate, args.max_rate), concurrency=args.workers)
+            with create_session(args.workers) as session:
+                done, pending = crawl_to_state(page_urls, state, session, args.workers, cache, throttle, args.parser)
+            print(throttle.describe())
+            if cache:
+                print(f"缓存命中 {cache.stats['hit']}，重新验证 {cache.stats['revalidated']}，"
+                      f"下载 {cache.stats['miss']}")
+        print(f"共 {len(page_urls)} 个页面，已完成 {len(page_urls) - pending} 个，本次爬取 {pending} 个、"
+              f"成功 {done} 个，耗时 {time.perf_counter() - start:.2f} 秒")
+        if done < pending:
+            print("部分页面爬取失败，重新运行将继续爬取未完成的页面")
+        
+        # 按页面顺序读取全部已完成页面的书籍信息
+        records = state.records(page_urls)
     
-    if html:
-        # 解析书籍信息
-        books_name, books_rating, books_image = parse_book_info(html)
+    if records:
+        print(f"\n成功爬取 {len(records)} 本书籍信息")
         
-        if books_name:
-            print(f"\n成功爬取 {len(books_name)} 本书籍信息")
-            
-            # 任务点6：保存数据到指定路径
-            save_to_file(books_name, './data/书籍名称/书籍mingcl.txt')
-            save_to_file(books_rating, './data/书籍评分/书籍评分.txt')
-            save_to_file(books_image, './data/书籍图片/书籍图片.txt')
-            
-            print("\n" + "=" * 50)
-            print("爬取完成！")
-            print("=" * 50)
-        else:
-            print("未能提取到书籍信息，可能网站结构已变化")
+        # 书籍记录按 book_id 写入记录存储，只追加新增或有变化的书籍
+        store = open_record_store(args.output, args.store)
+        try:
+            written = store.write(records)
+        finally:
+            store.close()
+        print(f"书籍记录已保存到: {args.output}（新增或更新 {written} 条）")
+        
+        # 任务点6：保存数据到指定路径（由同一批记录生成，三个文件按行一一对应）
+        books_name = [record['name'] for record in records]
+        books_rating = [record['rating'] for record in records]
+        books_image = [record['image'] for record in records]
+        save_to_file(books_name, './data/书籍名称/书籍mingcl.txt')
+        save_to_file(books_rating, './data/书籍评分/书籍评分.txt')
+        save_to_file(books_image, './data/书籍图片/书籍图片.txt')
+        
+        if args.download_images:
+            image_urls = list(dict.fromkeys(image for image in books_image if image != "无图片"))
+            with create_session(args.workers) as session:
+                downloaded, skipped, failed = download_images(
+                    image_urls, './data/书籍封面', session, args.workers,
+                    Throttle(rate=args.rate, max_rate=max(args.rate, args.max_rate), concurrency=args.workers)
+                )
+            print(f"封面图片：新下载 {downloaded} 张，已存在跳过 {skipped} 张，失败 {failed} 张")
+        
+        print("\n" + "=" * 50)
+        print("爬取完成！")
+        print("=" * 50)
     else:
-        print("无法获取网页内容")
+        print("未能提取到书籍信息，可能网站结构已变化")
 
 if __name__ == '__main__':
     main()
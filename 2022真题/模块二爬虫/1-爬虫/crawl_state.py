@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""
+爬取进度存储（SQLite）
+    frontier  待爬取URL及其状态：pending 待爬取 / leased 已被工作进程租用 / done 已完成 / failed 失败（下次运行重试）
+    records   每个页面解析出的书籍记录，以 (页面URL, 序号) 为主键，同一页面重复完成时覆盖而不会重复
+
+每个页面获取并解析后，在同一个事务中写入记录并标记为 done；
+程序中途退出或被封禁后重新运行，只会爬取尚未完成的页面，已完成页面的记录直接从库中读取
+
+多进程模式下 frontier 同时作为共享工作队列：工作进程用 lease 租用URL，租约有时限，
+工作进程异常退出后其未完成的URL在租约到期后会被其他进程重新租用
+"""
+
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS frontier (
+        url TEXT PRIMARY KEY,
+        position INTEGER NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        error TEXT,
+        updated_at REAL,
+        lease_owner TEXT,
+        lease_expires REAL
+    );
+    CREATE INDEX IF NOT EXISTS ix_frontier_status ON frontier (status, position);
+    CREATE TABLE IF NOT EXISTS records (
+        url TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        book_id TEXT NOT NULL,
+        name TEXT NOT NULL,
+        rating TEXT NOT NULL,
+        image TEXT NOT NULL,
+        link TEXT NOT NULL,
+        PRIMARY KEY (url, seq)
+    );
+"""
+
+# 旧版本进度库缺少的列
+MIGRATIONS = {
+    'lease_owner': 'ALTER TABLE frontier ADD COLUMN lease_owner TEXT',
+    'lease_expires': 'ALTER TABLE frontier ADD COLUMN lease_expires REAL',
+}
+
+class CrawlState:
+    """爬取进度，多个线程共用一个连接，写操作串行执行"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self._migrate_records()
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(frontier)')}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                self.conn.execute(statement)
+        self._lock = threading.Lock()
+
+    def _migrate_records(self):
+        """旧版本进度库的记录没有书籍ID：删除旧记录并把已完成页面改回待爬取（页面通常仍在HTTP缓存中）"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(records)')}
+        if columns and 'book_id' not in columns:
+            with self.conn:
+                self.conn.execute('DROP TABLE records')
+                self.conn.execute("UPDATE frontier SET status = 'pending' WHERE status = 'done'")
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def reset(self):
+        """清空全部进度，从头开始爬取"""
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM records')
+            self.conn.execute('DELETE FROM frontier')
+
+    def add_urls(self, urls):
+        """把URL加入待爬取队列，已存在的URL保持原状态"""
+        with self._lock, self.conn:
+            start = self.conn.execute('SELECT COALESCE(MAX(position), -1) + 1 FROM frontier').fetchone()[0]
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO frontier (url, position, updated_at) VALUES (?, ?, ?)',
+                [(url, start + i, time.time()) for i, url in enumerate(urls)]
+            )
+
+    def pending(self, urls):
+        """返回 urls 中尚未完成的URL，保持原顺序"""
+        with self._lock:
+            done = {row[0] for row in self.conn.execute("SELECT url FROM frontier WHERE status = 'done'")}
+        return [url for url in urls if url not in done]
+
+    def complete(self, url, records):
+        """保存页面解析出的书籍记录并标记为完成（同一事务）"""
+        rows = [(url, i, record['book_id'], record['name'], record['rating'], record['image'], record['url'])
+                for i, record in enumerate(records)]
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM records WHERE url = ?', (url,))
+            self.conn.executemany(
+                'INSERT INTO records (url, seq, book_id, name, rating, image, link) VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self.conn.execute(
+                "UPDATE frontier SET status = 'done', attempts = attempts + 1, error = NULL, updated_at = ? "
+                "WHERE url = ?", (time.time(), url)
+            )
+
+    def fail(self, url, error):
+        """记录失败，下次运行时重试；租约过期后已被其他进程完成的URL保持完成状态"""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "UPDATE frontier SET status = 'failed', attempts = attempts + 1, error = ?, updated_at = ? "
+                "WHERE url = ? AND status != 'done'", (str(error), time.time(), url)
+            )
+
+    def requeue(self, urls):
+        """把 urls 中失败或租约残留的URL重新放回待爬取状态"""
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "UPDATE frontier SET status = 'pending', lease_owner = NULL, lease_expires = NULL "
+                "WHERE url = ? AND status IN ('failed', 'leased')", [(url,) for url in urls]
+            )
+
+    def lease(self, owner, lease_seconds):
+        """
+        租用一个待爬取或租约已过期的URL，没有可租用的URL时返回 None
+        单条UPDATE语句完成查找和占用，多个进程同时租用也不会拿到同一个URL
+        """
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "UPDATE frontier SET status = 'leased', lease_owner = ?, lease_expires = ?, updated_at = ? "
+                "WHERE url = (SELECT url FROM frontier "
+                "             WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) "
+                "             ORDER BY position LIMIT 1) "
+                "RETURNING url", (owner, now + lease_seconds, now, now)
+            ).fetchone()
+        return row[0] if row else None
+
+    def has_leases(self):
+        """是否还有被租用的URL（可能仍在处理，也可能等待租约过期后重新租用）"""
+        with self._lock:
+            return self.conn.execute("SELECT 1 FROM frontier WHERE status = 'leased' LIMIT 1").fetchone() is not None
+
+    def records(self, urls):
+        """按 urls 顺序读取已完成页面的书籍记录"""
+        order = {url: i for i, url in enumerate(urls)}
+        with self._lock:
+            rows = self.conn.execute('SELECT url, seq, book_id, name, rating, image, link FROM records').fetchall()
+        rows = sorted((row for row in rows if row[0] in order), key=lambda row: (order[row[0]], row[1]))
+        return [{'book_id': row[2], 'name': row[3], 'rating': row[4], 'image': row[5], 'url': row[6]}
+                for row in rows]
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫HTTP响应缓存
+按URL把响应体和 ETag / Last-Modified 保存到磁盘：
+    - 缓存未过期（TTL内）直接使用，不发请求
+    - 已过期时带 If-None-Match / If-Modified-Since 重新验证，服务器返回304则继续使用缓存内容
+    - 缓存总大小超过上限时按最近使用时间淘汰
+
+每个URL对应一个文件，第一行为JSON元数据，其后为响应体；先写临时文件再替换，多线程同时写入也不会读到半个文件
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import namedtuple
+
+CacheEntry = namedtuple('CacheEntry', ['body', 'etag', 'last_modified', 'stored_at'])
+
+class HttpCache:
+    """磁盘HTTP缓存，线程安全"""
+
+    def __init__(self, directory, ttl=24 * 3600, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = {'hit': 0, 'revalidated': 0, 'miss': 0}
+        self._size = None
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, url):
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key[:2], key + '.cache')
+
+    def get(self, url):
+        """读取缓存条目，不存在或文件损坏时返回 None"""
+        path = self._path(url)
+        try:
+            with open(path, 'rb') as f:
+                meta = json.loads(f.readline())
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or len(body) != meta.get('size'):
+            return None
+        # 更新修改时间作为最近使用时间，淘汰时优先删除最久未使用的条目
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return CacheEntry(body, meta.get('etag'), meta.get('last_modified'), meta['stored_at'])
+
+    def is_fresh(self, entry):
+        """条目是否仍在TTL内"""
+        return time.time() - entry.stored_at < self.ttl
+
+    @staticmethod
+    def conditional_headers(entry):
+        """重新验证用的条件请求头"""
+        request_headers = {}
+        if entry.etag:
+            request_headers['If-None-Match'] = entry.etag
+        if entry.last_modified:
+            request_headers['If-Modified-Since'] = entry.last_modified
+        return request_headers
+
+    def put(self, url, body, etag=None, last_modified=None):
+        """保存响应；没有任何验证头时同样缓存，TTL过期后重新完整下载"""
+        if len(body) > self.max_bytes:
+            return
+        meta = json.dumps({
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'stored_at': time.time(),
+            'size': len(body)
+        }, ensure_ascii=False).encode('utf-8')
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(meta + b'\n')
+            f.write(body)
+        old_size = self._file_size(path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size is not None:
+                self._size += len(meta) + 1 + len(body) - old_size
+        self._evict()
+
+    def refresh(self, url, entry, etag=None, last_modified=None):
+        """服务器返回304：沿用缓存内容，重置TTL并更新验证头"""
+        self.put(url, entry.body, etag or entry.etag, last_modified or entry.last_modified)
+
+    def delete(self, url):
+        """删除缓存条目，如内容不可用的页面（验证页、封禁页），下次获取时重新下载"""
+        path = self._path(url)
+        size = self._file_size(path)
+        try:
+            os.remove(path)
+        except OSError:
+            return
+        with self._lock:
+            if self._size is not None:
+                self._size -= size
+
+    def iter_entries(self):
+        """遍历所有缓存条目，返回 (url, 响应体)，不更新最近使用时间"""
+        for _, _, path in sorted(self._scan(), key=lambda item: item[2]):
+            try:
+                with open(path, 'rb') as f:
+                    meta = json.loads(f.readline())
+                    body = f.read()
+            except (OSError, ValueError):
+                continue
+            if len(body) == meta.get('size'):
+                yield meta['url'], body
+
+    def record(self, outcome):
+        """记录一次缓存结果：hit / revalidated / miss"""
+        with self._lock:
+            self.stats[outcome] += 1
+
+    @staticmethod
+    def _file_size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    def _scan(self):
+        """列出所有缓存文件：[(最近使用时间, 大小, 路径), ...]"""
+        files = []
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                if not name.endswith('.cache'):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        return files
+
+    def _evict(self):
+        """总大小超过上限时删除最久未使用的条目，直到降到上限的90%"""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            if self._size <= self.max_bytes:
+                return
+            target = self.max_bytes * 0.9
+            files = sorted(self._scan())
+            self._size = sum(size for _, size, _ in files)
+            for _, size, path in files:
+                if self._size <= target:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                self._size -= size
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+书籍封面图片下载
+并发下载图片链接，响应体按块直接写入磁盘，不在内存中保存整张图片；
+文件按内容的SHA-256命名，重复运行或多个链接指向同一张图片时不会重复保存；
+清单文件 manifest.csv 记录 图片链接 → 文件名，清单中已有且文件存在的链接直接跳过
+
+用法：
+    python 1-爬虫/image_downloader.py
+    python 1-爬虫/image_downloader.py --input ./data/书籍图片/书籍图片.txt --output ./data/书籍封面 --workers 8
+"""
+
+import argparse
+import csv
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from urllib.parse import urlsplit
+
+import requests
+
+from throttle import RETRY_STATUS, Throttle, backoff_delay, parse_retry_after
+
+MANIFEST_FIELDS = ['url', 'file', 'sha256', 'size']
+CHUNK_SIZE = 64 * 1024
+CONTENT_TYPE_EXTENSIONS = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp', 'image/gif': '.gif'}
+
+def load_manifest(path):
+    """读取清单，返回 {图片链接: 记录}；同一链接出现多次时以最后一条为准"""
+    manifest = {}
+    if os.path.exists(path):
+        with open(path, encoding='utf-8-sig', newline='') as f:
+            for row in csv.DictReader(f):
+                manifest[row['url']] = row
+    return manifest
+
+def read_image_urls(path):
+    """读取图片链接文件，去掉空行、“无图片”和重复链接，保持原顺序"""
+    with open(path, encoding='utf-8-sig') as f:
+        urls = [line.strip() for line in f]
+    return list(dict.fromkeys(url for url in urls if url.startswith(('http://', 'https://'))))
+
+def _extension(url, content_type):
+    ext = os.path.splitext(urlsplit(url).path)[1].lower()
+    if ext in ('.jpg', '.jpeg', '.png', '.webp', '.gif'):
+        return ext
+    return CONTENT_TYPE_EXTENSIONS.get((content_type or '').split(';')[0].strip(), '.img')
+
+def download_image(image_url, directory, session, throttle=None, retries=3):
+    """
+    下载一张图片，返回清单记录 {'url', 'file', 'sha256', 'size'}，失败返回 None
+    边下载边计算哈希并写入临时文件，完成后按哈希值重命名；同名文件已存在时删除临时文件
+    磁盘读写出错（如目录不可写、磁盘已满）同样只算这一张下载失败
+    """
+    tmp_path = os.path.join(directory, f'.{os.getpid()}.{threading.get_ident()}.part')
+    for attempt in range(retries + 1):
+        status = None
+        try:
+            with throttle.slot(image_url) if throttle else nullcontext():
+                with session.get(image_url, stream=True, timeout=30) as response:
+                    status = response.status_code
+                    if status == 200:
+                        digest = hashlib.sha256()
+                        size = 0
+                        with open(tmp_path, 'wb') as f:
+                            for chunk in response.iter_content(CHUNK_SIZE):
+                                digest.update(chunk)
+                                f.write(chunk)
+                                size += len(chunk)
+                        content_type = response.headers.get('Content-Type')
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        except (requests.Timeout, requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+            # 包括下载到一半连接中断，此时临时文件不完整，重试时覆盖
+            status = None
+            error = e
+            retry_after = None
+        except Exception as e:
+            print(f"下载图片出错 {image_url}: {e}")
+            break
+        if throttle:
+            throttle.report(image_url, status)
+        if status == 200:
+            filename = digest.hexdigest() + _extension(image_url, content_type)
+            path = os.path.join(directory, filename)
+            try:
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                else:
+                    os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"保存图片出错 {image_url}: {e}")
+                break
+            return {'url': image_url, 'file': filename, 'sha256': digest.hexdigest(), 'size': size}
+        if status is not None and status not in RETRY_STATUS:
+            print(f"下载图片失败 {image_url}，状态码: {status}")
+            break
+        if attempt < retries:
+            time.sleep(backoff_delay(attempt, retry_after=retry_after))
+        elif status is None:
+            print(f"下载图片出错 {image_url}: {error}")
+        else:
+            print(f"下载图片失败 {image_url}，状态码: {status}")
+    try:
+        os.remove(tmp_path)
+    except OSError:
+        pass
+    return None
+
+def download_images(urls, directory, session, workers=4, throttle=None):
+    """
+    并发下载图片到 directory，清单写入 directory/manifest.csv
+    清单中已有且文件仍存在的链接跳过；每完成一张立即追加到清单，中途退出后重新运行会继续下载
+    同时进行中的下载不超过 workers * 2 个，链接再多内存占用也不会增长
+    返回 (新下载数, 跳过数, 失败数)
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, 'manifest.csv')
+    manifest = load_manifest(manifest_path)
+    todo = [url for url in urls
+            if url not in manifest or not os.path.exists(os.path.join(directory, manifest[url]['file']))]
+    skipped = len(urls) - len(todo)
+    downloaded = failed = 0
+
+    new_manifest = not os.path.exists(manifest_path)
+    with open(manifest_path, 'a', encoding='utf-8-sig' if new_manifest else 'utf-8', newline='') as f, \
+            ThreadPoolExecutor(max_workers=workers) as executor:
+        writer = csv.DictWriter(f, fieldnames=MANIFEST_FIELDS)
+        if new_manifest:
+            writer.writeheader()
+        pending = set()
+
+        def collect(done):
+            nonlocal downloaded, failed
+            for future in done:
+                record = future.result()
+                if record is None:
+                    failed += 1
+                    continue
+                writer.writerow(record)
+                f.flush()
+                downloaded += 1
+
+        for image_url in todo:
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(download_image, image_url, directory, session, throttle))
+        collect(wait(pending).done)
+    return downloaded, skipped, failed
+
+def main():
+    parser = argparse.ArgumentParser(description='并发下载书籍封面图片')
+    parser.add_argument('--input', default='./data/书籍图片/书籍图片.txt', help='图片链接文件，每行一个链接')
+    parser.add_argument('--output', default='./data/书籍封面', help='图片保存目录')
+    parser.add_argument('--workers', type=int, default=4, help='最大并发下载数')
+    parser.add_argument('--rate', type=float, default=5, help='初始请求速率（次/秒）')
+    parser.add_argument('--max-rate', type=float, default=20, help='速率自适应上调的上限（次/秒）')
+    args = parser.parse_args()
+
+    from book_spider import create_session
+
+    urls = read_image_urls(args.input)
+    print(f"共 {len(urls)} 个图片链接")
+    throttle = Throttle(rate=args.rate, max_rate=max(args.rate, args.max_rate), concurrency=args.workers)
+    start = time.perf_counter()
+    with create_session(args.workers) as session:
+        downloaded, skipped, failed = download_images(urls, args.output, session, args.workers, throttle)
+    print(f"新下载 {downloaded} 张，已存在跳过 {skipped} 张，失败 {failed} 张，"
+          f"耗时 {time.perf_counter() - start:.2f} 秒")
+    print(f"图片保存在: {args.output}，清单: {os.path.join(args.output, 'manifest.csv')}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+书籍记录存储
+每本书一条记录，以稳定的 book_id 为键，取代按行号对应的三个txt文件；支持两种格式：
+    jsonl   每行一条JSON记录，只追加写入；同一本书出现多次时以最后一条为准
+    sqlite  books 表，book_id 为主键
+
+写入：只写入新增或内容有变化的记录，每批记录原子写入
+    jsonl   整批记录拼成一块数据追加到文件末尾（一次 write 没写完时继续写剩余部分）并 fsync；中途崩溃最多留下一行不完整的记录，读取时忽略
+    sqlite  整批记录在一个事务中 upsert
+读取：read(since) 返回 since 之后写入的记录和新的游标，下游保存游标即可每次只读取新记录
+    jsonl   游标为文件字节偏移量
+    sqlite  游标为写入序号
+
+用法（读取新记录，游标保存在 --checkpoint 文件中）：
+    python 1-爬虫/record_store.py ./data/books.jsonl --checkpoint ./data/books.cursor
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import time
+
+RECORD_FIELDS = ('book_id', 'name', 'rating', 'image', 'url')
+
+class JsonlRecordStore:
+    """JSONL格式记录存储"""
+
+    def __init__(self, path):
+        self.path = path
+        self._latest = {}      # book_id -> 最后一次写入的记录
+        records, _ = self.read()
+        for record in records:
+            self._latest[record['book_id']] = record
+
+    def write(self, records):
+        """追加新增或有变化的记录，返回写入条数"""
+        lines = []
+        for record in records:
+            record = {field: record[field] for field in RECORD_FIELDS}
+            if self._latest.get(record['book_id']) == record:
+                continue
+            self._latest[record['book_id']] = record
+            lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+        if not lines:
+            return 0
+        data = ''.join(lines).encode('utf-8')
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            # 上次写入中途崩溃留下的不完整行，先补换行使其独立成行（读取时忽略）
+            if os.fstat(fd).st_size and not self._ends_with_newline():
+                data = b'\n' + data
+            # os.write 可能只写入一部分（如被信号中断、磁盘将满），循环写完剩余部分
+            view = memoryview(data)
+            while view:
+                view = view[os.write(fd, view):]
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        return len(lines)
+
+    def _ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def read(self, since=0):
+        """读取字节偏移量 since 之后的完整记录，返回 (记录列表, 新游标)"""
+        if not os.path.exists(self.path):
+            return [], since
+        records = []
+        cursor = since
+        with open(self.path, 'rb') as f:
+            f.seek(since)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                cursor += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        return records, cursor
+
+    def close(self):
+        pass
+
+class SqliteRecordStore:
+    """SQLite格式记录存储"""
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, timeout=30)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS books (
+                book_id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                rating TEXT NOT NULL,
+                image TEXT NOT NULL,
+                url TEXT NOT NULL,
+                seq INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        self.conn.execute('CREATE INDEX IF NOT EXISTS ix_books_seq ON books (seq)')
+
+    def write(self, records):
+        """在一个事务中写入新增或有变化的记录，返回写入条数"""
+        with self.conn:
+            seq = self.conn.execute('SELECT COALESCE(MAX(seq), 0) FROM books').fetchone()[0]
+            written = 0
+            for record in records:
+                values = [record[field] for field in RECORD_FIELDS]
+                cursor = self.conn.execute(
+                    'INSERT INTO books (book_id, name, rating, image, url, seq, updated_at) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?) '
+                    'ON CONFLICT(book_id) DO UPDATE SET name = excluded.name, rating = excluded.rating, '
+                    'image = excluded.image, url = excluded.url, seq = excluded.seq, updated_at = excluded.updated_at '
+                    'WHERE (name, rating, image, url) IS NOT (excluded.name, excluded.rating, excluded.image, excluded.url)',
+                    values + [seq + written + 1, time.time()]
+                )
+                written += cursor.rowcount
+        return written
+
+    def read(self, since=0):
+        """读取写入序号大于 since 的记录，返回 (记录列表, 新游标)"""
+        rows = self.conn.execute(
+            f'SELECT {", ".join(RECORD_FIELDS)}, seq FROM books WHERE seq > ? ORDER BY seq', (since,)
+        ).fetchall()
+        records = [dict(zip(RECORD_FIELDS, row[:-1])) for row in rows]
+        return records, rows[-1][-1] if rows else since
+
+    def close(self):
+        self.conn.close()
+
+RECORD_STORES = {'jsonl': JsonlRecordStore, 'sqlite': SqliteRecordStore}
+
+def open_record_store(path, kind=None):
+    """打开记录存储，kind 为 jsonl / sqlite，不指定时按扩展名判断（.db / .sqlite 为 sqlite）"""
+    if kind is None:
+        kind = 'sqlite' if os.path.splitext(path)[1] in ('.db', '.sqlite') else 'jsonl'
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    return RECORD_STORES[kind](path)
+
+def main():
+    parser = argparse.ArgumentParser(description='读取书籍记录存储中的新记录，以JSONL输出')
+    parser.add_argument('path', help='记录文件（.jsonl 或 .db）')
+    parser.add_argument('--store', choices=sorted(RECORD_STORES), help='存储格式，默认按扩展名判断')
+    parser.add_argument('--checkpoint', help='游标文件：从上次读取的位置继续，读取后更新；不指定时读取全部记录')
+    args = parser.parse_args()
+
+    since = 0
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        with open(args.checkpoint, encoding='utf-8') as f:
+            since = int(f.read().strip() or 0)
+    store = open_record_store(args.path, args.store)
+    try:
+        records, cursor = store.read(since)
+    finally:
+        store.close()
+    for record in records:
+        print(json.dumps(record, ensure_ascii=False))
+    if args.checkpoint:
+        tmp_path = args.checkpoint + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(str(cursor))
+        os.replace(tmp_path, args.checkpoint)
+
+if __name__ == '__main__':
+    main()
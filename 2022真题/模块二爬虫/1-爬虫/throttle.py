@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+"""
+爬虫限速与重试
+    - 每个域名一个令牌桶，限制请求速率
+    - 并发数和速率按响应情况自适应调整（加性增、乘性减）：
+      收到429/503或超时时减半，连续正常响应时逐步恢复，以不被封禁的最高速率运行
+    - 429/5xx/超时按指数退避加随机抖动重试，服务器给出 Retry-After 时按其等待
+"""
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+# 需要重试的状态码
+RETRY_STATUS = {429, 500, 502, 503, 504}
+# 表示服务器在限流、需要降速的状态码
+THROTTLE_STATUS = {429, 503}
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    """
+    第 attempt 次重试前的等待秒数（attempt 从0开始）
+    指数退避加全抖动：在 [0, min(cap, base * 2^attempt)] 内随机取值，避免多个线程同时重试；
+    服务器给出 Retry-After 时不少于该值
+    """
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, min(cap, retry_after))
+    return delay
+
+def parse_retry_after(value):
+    """解析 Retry-After 头（只支持秒数形式），无法解析时返回 None"""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒的速度补充令牌，最多积累 burst 个"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """取一个令牌，不足时等待"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+class Throttle:
+    """
+    按域名限速并自适应控制并发数，线程安全
+    用法：
+        with throttle.slot(url):
+            response = session.get(url)
+        throttle.report(url, response.status_code)   # 超时等异常传 None
+    """
+
+    def __init__(self, rate=2.0, max_rate=10.0, min_rate=0.2, burst=None,
+                 concurrency=4, min_concurrency=1, cooldown=2.0):
+        self.initial_rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.burst = burst
+        self.max_concurrency = concurrency
+        self.min_concurrency = min_concurrency
+        self.cooldown = cooldown
+        self.concurrency = float(concurrency)
+        self._active = 0
+        self._buckets = {}
+        self._last_decrease = {}
+        self._condition = threading.Condition()
+
+    def _bucket(self, host):
+        """取域名对应的令牌桶（调用方需持有锁）"""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            burst = self.burst or max(1, self.max_concurrency)
+            bucket = self._buckets[host] = TokenBucket(self.initial_rate, burst)
+        return bucket
+
+    @contextmanager
+    def slot(self, url):
+        """占用一个并发名额并取得该域名的令牌后执行请求"""
+        host = urlsplit(url).netloc
+        with self._condition:
+            while self._active >= int(self.concurrency):
+                self._condition.wait()
+            self._active += 1
+            bucket = self._bucket(host)
+        try:
+            bucket.acquire()
+            yield
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._condition.notify()
+
+    def report(self, url, status):
+        """
+        反馈一次请求结果，status 为状态码，超时或连接错误传 None
+        限流信号：速率和并发数减半（冷却期内只减一次，避免同一批并发失败连续减半）；
+        正常响应：速率每次加 0.1/秒，并发数每个“并发数”次成功加1
+        """
+        host = urlsplit(url).netloc
+        with self._condition:
+            bucket = self._bucket(host)
+            if status is None or status in THROTTLE_STATUS:
+                now = time.monotonic()
+                if now - self._last_decrease.get(host, 0) < self.cooldown:
+                    return
+                self._last_decrease[host] = now
+                bucket.rate = max(self.min_rate, bucket.rate / 2)
+                self.concurrency = max(self.min_concurrency, self.concurrency / 2)
+            elif status < 500:
+                bucket.rate = min(self.max_rate, bucket.rate + 0.1)
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+                self._condition.notify_all()
+
+    def describe(self):
+        """当前并发数和各域名速率，用于输出运行状态"""
+        with self._condition:
+            rates = ', '.join(f'{host} {bucket.rate:.1f}/秒' for host, bucket in self._buckets.items())
+            return f'并发 {int(self.concurrency)}，速率 {rates or "-"}'
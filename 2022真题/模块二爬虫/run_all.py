@@ -50,7 +50,7 @@ def main():
     print("=" * 60)
     print("\n数据保存位置：./data/")
     print("\n第4题 - 书籍数据：")
-    print("  - ./data/书籍名称/书籍mingcl.txt (25本书)")
+    print("  - ./data/书籍名称/书籍mingcl.txt (250本书)")
     print("  - ./data/书籍评分/书籍评分.txt")
     print("  - ./data/书籍图片/书籍图片.txt")
     print("\n第5题 - 评论数据：")
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+测试公共夹具
+爬虫脚本之间按同目录模块导入，这里把 1-爬虫 加入导入路径；
+local_server 启动本地HTTP服务器代替真实网站，测试不访问外网
+"""
+
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+SPIDER_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '1-爬虫')
+FIXTURES_DIR = os.path.join(SPIDER_DIR, 'fixtures')
+sys.path.insert(0, SPIDER_DIR)
+
+class LocalServer:
+    """
+    本地HTTP/1.1服务器，支持长连接
+    routes(path) 返回 (状态码, 响应体)；requests 按顺序记录每个请求的 (路径, 客户端端口)
+    """
+
+    def __init__(self, routes):
+        self.routes = routes
+        self.requests = []
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                with server._lock:
+                    server.requests.append((self.path, self.client_address[1]))
+                status, body = server.routes(self.path)
+                body = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        threading.Thread(target=self.httpd.serve_forever, kwargs={'poll_interval': 0.05}, daemon=True).start()
+
+    def paths(self):
+        with self._lock:
+            return [path for path, _ in self.requests]
+
+    def client_ports(self):
+        with self._lock:
+            return {port for _, port in self.requests}
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+@pytest.fixture
+def local_server():
+    """返回启动函数 start(routes)，测试结束后关闭启动的服务器"""
+    servers = []
+
+    def start(routes):
+        server = LocalServer(routes)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
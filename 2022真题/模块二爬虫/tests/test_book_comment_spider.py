@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""book_comment_spider：流水线输出的评论条数和CSV格式"""
+
+import csv
+import re
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import book_comment_spider
+from book_comment_spider import FIELDNAMES, CommentPipeline
+from book_spider import build_page_urls, create_session
+
+BOOKS = 3
+STAR_TITLES = ['很差', '较差', '还行', '推荐', '力荐']
+
+def list_page():
+    items = ''.join(f'''
+<table width="100%"><tr class="item">
+  <td><a class="nbg" href="/subject/{100 + i}/"><img src="/img/s{i}.jpg" width="90" /></a></td>
+  <td><div class="pl2"><a href="/subject/{100 + i}/" title="书{i}">书{i}</a></div>
+      <div class="star clearfix"><span class="rating_nums">9.{i}</span></div></td>
+</tr></table>''' for i in range(BOOKS))
+    return f'<html><body><div class="indent">{items}</div></body></html>'
+
+def detail_page(book_id):
+    return f'<html><body><h1><span property="v:itemreviewed">详情书名{book_id}</span></h1></body></html>'
+
+def comments_page(book_id, start):
+    items = []
+    for n in range(start, start + book_comment_spider.COMMENTS_PER_PAGE):
+        # 每7条有一条未打分
+        stars = '' if n % 7 == 0 else (
+            f'<span class="user-stars allstar{n % 5 + 1}0 rating" title="{STAR_TITLES[n % 5]}"></span>')
+        items.append(f'''
+<li class="comment-item" data-cid="{n}"><div class="comment"><h3>
+  <span class="comment-info"><a href="/people/u{n}/">用户{n}</a>{stars}
+  <a class="comment-time" href="#">2024-0{n % 9 + 1}-1{n % 10} 10:00:00</a></span></h3>
+  <p class="comment-content"><span class="short">书{book_id}的评论
+    {n}, "带逗号和引号"</span></p></div></li>''')
+    return f'<html><body><ul>{"".join(items)}</ul></body></html>'
+
+def routes(path):
+    parts = urlsplit(path)
+    start = int(parse_qs(parts.query).get('start', ['0'])[0])
+    match = re.fullmatch(r'/subject/(\d+)/(comments/)?', parts.path)
+    if parts.path == '/top250':
+        return 200, list_page()
+    if match and match.group(2):
+        return 200, comments_page(int(match.group(1)), start)
+    if match:
+        return 200, detail_page(int(match.group(1)))
+    return 404, ''
+
+def run_pipeline(server, output, **options):
+    with create_session() as session:
+        pipeline = CommentPipeline(session, None, None, str(output), **options)
+        return pipeline.run(build_page_urls(server.url + '/top250', 1))
+
+def test_pipeline_writes_all_comments(local_server, tmp_path):
+    server = local_server(routes)
+    output = tmp_path / 'book_comments.csv'
+
+    stats = run_pipeline(server, output, fetch_workers=4, parse_workers=2, queue_size=2, comment_pages=2)
+
+    with open(output, encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert reader.fieldnames == FIELDNAMES
+    assert stats == {'pages': 1 + BOOKS + BOOKS * 2, 'failed': 0, 'books': BOOKS, 'comments': len(rows)}
+    assert len(rows) == BOOKS * 2 * book_comment_spider.COMMENTS_PER_PAGE
+    assert {row['书名'] for row in rows} == {f'详情书名{100 + i}' for i in range(BOOKS)}
+    for row in rows:
+        assert re.fullmatch(r'用户\d+', row['作者'])
+        assert row['内容'].endswith('"带逗号和引号"') and '\n' not in row['内容']
+        assert row['评分'] in {'', '1星', '2星', '3星', '4星', '5星'}
+        assert (row['标题'] == '') == (row['评分'] == '')
+        assert re.fullmatch(r'\d{4}-\d{2}-\d{2}', row['日期'])
+
+def test_pipeline_limits_books(local_server, tmp_path):
+    server = local_server(routes)
+
+    stats = run_pipeline(server, tmp_path / 'book_comments.csv', books=2)
+
+    assert stats['books'] == 2
+    assert stats['comments'] == 2 * book_comment_spider.COMMENTS_PER_PAGE
+
+def test_writer_error_stops_pipeline(local_server, tmp_path):
+    server = local_server(routes)
+    result = {}
+
+    def target():
+        # 输出路径是目录，写入阶段打开文件失败
+        try:
+            run_pipeline(server, tmp_path, queue_size=1, comment_pages=2)
+        except OSError as e:
+            result['error'] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout=30)
+    assert not thread.is_alive(), '写入阶段出错后流水线没有停止'
+    assert 'error' in result
+
+def test_fetch_error_counts_as_failed(local_server, tmp_path, monkeypatch):
+    server = local_server(routes)
+    get_book_data = book_comment_spider.get_book_data
+
+    def flaky_get_book_data(page_url, *args, **kwargs):
+        if '/subject/101/comments/' in page_url:
+            raise ValueError('模拟获取出错')
+        return get_book_data(page_url, *args, **kwargs)
+
+    monkeypatch.setattr(book_comment_spider, 'get_book_data', flaky_get_book_data)
+    stats = run_pipeline(server, tmp_path / 'book_comments.csv')
+
+    assert stats['failed'] == 1
+    assert stats['comments'] == (BOOKS - 1) * book_comment_spider.COMMENTS_PER_PAGE
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+"""book_spider：连接复用与 429/5xx 重试"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+import book_spider
+from conftest import read_fixture
+
+def top250_routes(failures=None):
+    """列表页路由：按 start 返回保存的样例页面；failures 为 {路径: [状态码, ...]}，依次先返回这些错误状态"""
+    failures = failures or {}
+
+    def routes(path):
+        if failures.get(path):
+            return failures[path].pop(0), ''
+        start = int(parse_qs(urlsplit(path).query).get('start', ['0'])[0])
+        return 200, read_fixture(f'top250_start{start % 100}.html')
+    return routes
+
+@pytest.fixture
+def no_backoff(monkeypatch):
+    """重试前不等待"""
+    monkeypatch.setattr(book_spider, 'backoff_delay', lambda attempt, retry_after=None: 0)
+
+def test_shared_session_reuses_connections(local_server):
+    server = local_server(top250_routes())
+    urls = book_spider.build_page_urls(server.url + '/top250', 10)
+
+    with book_spider.create_session(pool_size=2) as session, ThreadPoolExecutor(max_workers=2) as executor:
+        pages = list(executor.map(lambda page_url: book_spider.get_book_data(page_url, session), urls))
+
+    assert all(len(book_spider.parse_book_records(html)) == 25 for html in pages)
+    assert len(server.requests) == 10
+    # 10个请求最多使用连接池大小个连接
+    assert len(server.client_ports()) <= 2
+
+@pytest.mark.parametrize('status', [429, 500, 502, 503, 504])
+def test_retries_throttled_and_server_errors(local_server, no_backoff, status):
+    server = local_server(top250_routes({'/top250?start=0': [status, status]}))
+
+    with book_spider.create_session() as session:
+        html = book_spider.get_book_data(server.url + '/top250?start=0', session, retries=3)
+
+    assert len(book_spider.parse_book_records(html)) == 25
+    assert server.paths() == ['/top250?start=0'] * 3
+
+def test_gives_up_after_retries(local_server, no_backoff):
+    server = local_server(top250_routes({'/top250?start=0': [503] * 10}))
+
+    with book_spider.create_session() as session:
+        assert book_spider.get_book_data(server.url + '/top250?start=0', session, retries=2) is None
+
+    assert len(server.requests) == 3
+
+def test_does_not_retry_client_errors(local_server, no_backoff):
+    server = local_server(top250_routes({'/top250?start=0': [404]}))
+
+    with book_spider.create_session() as session:
+        assert book_spider.get_book_data(server.url + '/top250?start=0', session) is None
+
+    assert len(server.requests) == 1